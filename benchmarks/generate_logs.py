@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+
+"""
+Writes synthetic results directories that look like real experiment output:
+runN.txt logs with a STARTING line and size/diversity report per generation
+followed by a SOLUTION line, and runN_types.edn type frequency files.
+Used by run_benchmarks.py, and handy for trying the scrapers out.
+"""
+
+import argparse
+import os
+import random
+
+OUTCOMES = ["SOLUTION GENERALIZED", "SOLUTION FAILED TO GENERALIZE", "SOLUTION NOT FOUND"]
+
+
+def clojure_number(rng):
+    """A mean as Clojure prints it: sometimes a ratio, sometimes a float."""
+    if rng.random() < 0.5:
+        return f"{rng.randint(1, 99999)}/{rng.randint(2, 999)}"
+    return f"{rng.uniform(1, 500):.4f}"
+
+
+def size_map(rng):
+    return (f"{{:min 1, :25% {rng.randint(1, 20)}, :50% {rng.randint(10, 60)}, "
+            f":75% {rng.randint(40, 120)}, :max {rng.randint(100, 1000)}, :mean {clojure_number(rng)}}}")
+
+
+def write_log(path, rng, generations, line_width, outcome, truncate=False):
+    """
+    Writes one run log with generations + 1 generations. outcome is one of
+    OUTCOMES, or None for a run that is still going. truncate cuts the last
+    line off partway, like a log caught in the middle of a write.
+    """
+    filler = ";; " + "=" * max(0, line_width - 3) + "\n"
+    with open(path, 'w') as f:
+        f.write("Command line args: {:population-size 1000, :max-generations %d}\n" % generations)
+        f.write(filler)
+        for gen in range(generations + 1):
+            f.write(f"STARTING {gen}\n")
+            f.write(filler)
+            f.write("{:generation %d,\n" % gen)
+            f.write(" :best-total-error %d,\n" % rng.randint(0, 10000))
+            f.write(" :code-size %s,\n" % size_map(rng))
+            f.write(" :genome-size %s,\n" % size_map(rng))
+            f.write(" :unique-behaviors %d,\n" % rng.randint(1, 1000))
+            f.write(" :behavioral-diversity %s}\n" % clojure_number(rng))
+            f.write(filler)
+        if outcome is not None:
+            f.write(f"{outcome}\n")
+        if truncate:
+            f.write(" :unique-behav")
+
+
+def write_types(path, rng, num_types):
+    """Writes a runN_types.edn file with num_types [type frequency] pairs."""
+    with open(path, 'w') as f:
+        for t in range(num_types):
+            prefix = "[" if t == 0 else " "
+            f.write(f"{prefix}[{{:type :vector, :child {{:type :t{t}}}}} {int(rng.paretovariate(0.8))}]\n")
+        f.write("]")
+
+
+def generate(directory, runs=10, generations=100, line_width=200, in_progress=0.1,
+             truncated=0.0, success=0.5, generalize=0.6, types=200, seed=0):
+    """
+    Fills directory with runs runs. Each run is still in progress with
+    probability in_progress (and then ends in a partly written line with
+    probability truncated). Finished runs find a solution with probability
+    success, which generalizes with probability generalize. Returns the
+    number of bytes written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    total_bytes = 0
+    for i in range(runs):
+        log_path = os.path.join(directory, f"run{i}.txt")
+        if rng.random() < in_progress:
+            outcome = None
+            gens = rng.randint(0, generations)
+            truncate = rng.random() < truncated
+        else:
+            if rng.random() < success:
+                outcome = OUTCOMES[0] if rng.random() < generalize else OUTCOMES[1]
+                gens = rng.randint(0, generations)
+            else:
+                outcome = OUTCOMES[2]
+                gens = generations
+            truncate = False
+        write_log(log_path, rng, gens, line_width, outcome, truncate)
+
+        types_path = os.path.join(directory, f"run{i}_types.edn")
+        write_types(types_path, rng, max(1, int(rng.gauss(types, types / 5))))
+
+        total_bytes += os.path.getsize(log_path) + os.path.getsize(types_path)
+    return total_bytes
+
+
+def generate_experiment(parent, problems=3, **kwargs):
+    """Writes problems results directories named prob0, prob1, ... under parent."""
+    seed = kwargs.pop('seed', 0)
+    return sum(generate(os.path.join(parent, f"prob{p}"), seed=seed + p, **kwargs)
+               for p in range(problems))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic GP results directories.")
+    parser.add_argument("directory", help="Where to write the logs (one subdirectory per problem if --problems is given)")
+    parser.add_argument("--problems", type=int, default=0, help="Number of problem subdirectories (0 writes runs directly into directory)")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per problem")
+    parser.add_argument("--generations", type=int, default=100, help="Maximum generation of a run")
+    parser.add_argument("--line-width", type=int, default=200, help="Width of the filler lines around each report")
+    parser.add_argument("--in-progress", type=float, default=0.1, help="Fraction of runs still going")
+    parser.add_argument("--truncated", type=float, default=0.0, help="Fraction of in-progress runs cut off mid-line")
+    parser.add_argument("--success", type=float, default=0.5, help="Fraction of finished runs that find a solution")
+    parser.add_argument("--generalize", type=float, default=0.6, help="Fraction of solutions that generalize")
+    parser.add_argument("--types", type=int, default=200, help="Average number of types per runN_types.edn")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    kwargs = dict(runs=args.runs, generations=args.generations, line_width=args.line_width,
+                  in_progress=args.in_progress, truncated=args.truncated, success=args.success,
+                  generalize=args.generalize, types=args.types, seed=args.seed)
+    if args.problems > 0:
+        written = generate_experiment(args.directory, args.problems, **kwargs)
+    else:
+        written = generate(args.directory, **kwargs)
+    print(f"Wrote {written / 1e6:.1f} MB to {os.path.abspath(args.directory)}")
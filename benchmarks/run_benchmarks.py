@@ -0,0 +1,188 @@
+#!/usr/bin/python3
+
+"""
+Times the scrapers on synthetic experiments of several sizes.
+
+For each scale, generate_logs.py writes an experiment of a few problems,
+then every tool is run in its own process on it. Each timing is the best of
+--repeat runs with the scan caches removed beforehand, so every run is a
+cold scan. The report gives wall time, throughput in MB/s and files/s, and
+the peak RSS of the tool's process, and compares the times with a stored
+baseline when there is one.
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import generate_logs
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# problems x runs x generations, plus the width of the filler lines
+SCALES = {
+    'small': dict(problems=2, runs=10, generations=50, line_width=200),
+    'medium': dict(problems=4, runs=50, generations=300, line_width=400),
+    'large': dict(problems=8, runs=100, generations=1000, line_width=800),
+}
+
+LOAD_STATS_SCRIPT = """
+import sys
+sys.path.insert(0, {repo!r})
+from cbgp_tools import plotter
+plotter.load_stats({path!r}, 'mean', {chunk_rows})
+plotter.load_stats({path!r}, 'median', {chunk_rows})
+"""
+
+
+def run_timed(cmd, cwd):
+    """
+    Runs cmd and returns (wall seconds, peak RSS in MB) for that process
+    alone, using os.wait4 to get the child's own resource usage.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    stderr = proc.stderr.read().decode('utf-8', errors='replace')
+    proc.stderr.close()
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed:\n{stderr}")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return elapsed, usage.ru_maxrss / scale
+
+
+def clear_caches(parent):
+    for path in glob.glob(os.path.join(parent, "*", ".*_cache.json")):
+        os.remove(path)
+
+
+def files_and_bytes(directories, pattern):
+    paths = [path for directory in directories for path in glob.glob(os.path.join(directory, pattern))]
+    return len(paths), sum(os.path.getsize(path) for path in paths)
+
+
+def benchmark_scale(name, params, workdir, repeat, jobs):
+    """Generates one experiment and times every tool on it. Returns a list of result dicts."""
+    parent = os.path.join(workdir, name)
+    generate_logs.generate_experiment(parent, seed=1, **params)
+    problems = sorted(os.path.join(parent, prob) for prob in os.listdir(parent))
+    first = problems[0]
+    python = sys.executable
+
+    tools = [
+        # (tool, command, input files for the throughput numbers)
+        ('efficient_solution_counts',
+         [python, os.path.join(REPO_DIR, "efficient_solution_counts.py"), first, "csv", "nocache"],
+         files_and_bytes([first], "run*[0-9].txt")),
+        ('size_and_diversity',
+         [python, os.path.join(REPO_DIR, "size_and_diversity.py"), first, "--no-cache", "--jobs", str(jobs)],
+         files_and_bytes([first], "run*[0-9].txt")),
+        ('count_types',
+         [python, os.path.join(REPO_DIR, "count_types.py"), first, "csv", "--jobs", str(jobs)],
+         files_and_bytes([first], "run*_types.edn")),
+        ('mass_scraper',
+         [python, os.path.join(REPO_DIR, "mass_scraper.py"), parent + os.sep, "--jobs", str(jobs)],
+         files_and_bytes(problems, "run*[0-9].txt")),
+    ]
+
+    results = []
+    for tool, cmd, (num_files, num_bytes) in tools:
+        best = None
+        for _ in range(repeat):
+            clear_caches(parent)
+            timing = run_timed(cmd, cwd=workdir)
+            if best is None or timing[0] < best[0]:
+                best = timing
+        results.append(result_dict(name, tool, best, num_files, num_bytes))
+
+    # plotter.load_stats reads the CSV that size_and_diversity just wrote,
+    # whole and then streamed in chunks
+    csv_path = os.path.join(workdir, f"{name}-prob0-size-and-diversity.csv")
+    if os.path.exists(csv_path):
+        for tool, chunk_rows in (('plotter.load_stats', 0), ('plotter.load_stats_chunked', 10000)):
+            script = LOAD_STATS_SCRIPT.format(repo=REPO_DIR, path=csv_path, chunk_rows=chunk_rows)
+            best = min((run_timed([python, "-c", script], cwd=workdir) for _ in range(repeat)),
+                       key=lambda timing: timing[0])
+            results.append(result_dict(name, tool, best, 1, os.path.getsize(csv_path)))
+
+    return results
+
+
+def result_dict(scale, tool, timing, num_files, num_bytes):
+    seconds, rss = timing
+    return {
+        'scale': scale,
+        'tool': tool,
+        'seconds': seconds,
+        'mb_per_s': num_bytes / 1e6 / seconds,
+        'files_per_s': num_files / seconds,
+        'peak_rss_mb': rss,
+        'files': num_files,
+        'mb': num_bytes / 1e6,
+    }
+
+
+def print_report(results, baseline):
+    print(f"{'scale':<8} {'tool':<26} {'files':>6} {'MB':>8} {'time (s)':>9} "
+          f"{'MB/s':>8} {'files/s':>8} {'RSS MB':>7} {'vs base':>8}")
+    for result in results:
+        key = f"{result['scale']}/{result['tool']}"
+        if key in baseline:
+            compare = f"{result['seconds'] / baseline[key]['seconds']:7.2f}x"
+        else:
+            compare = "       -"
+        print(f"{result['scale']:<8} {result['tool']:<26} {result['files']:>6} {result['mb']:>8.1f} "
+              f"{result['seconds']:>9.3f} {result['mb_per_s']:>8.1f} {result['files_per_s']:>8.1f} "
+              f"{result['peak_rss_mb']:>7.1f} {compare}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers on synthetic logs.")
+    parser.add_argument("--scales", nargs='+', choices=list(SCALES), default=['small', 'medium'],
+                        help="Which experiment sizes to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing; the fastest is kept")
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to the tools that take it")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE,
+                        help="Baseline JSON to compare against (times shown as multiples of it)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store these results as the new baseline")
+    parser.add_argument("--json", type=str, help="Also write the results to this JSON file")
+    parser.add_argument("--keep", type=str, help="Generate into this directory and keep it, instead of a temporary one")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = {f"{r['scale']}/{r['tool']}": r for r in json.load(f)}
+
+    workdir = args.keep or tempfile.mkdtemp(prefix="cbgp-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = []
+        for name in args.scales:
+            print(f"Running {name} scale...", file=sys.stderr)
+            results.extend(benchmark_scale(name, SCALES[name], workdir, args.repeat, args.jobs))
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
@@ -0,0 +1,25 @@
+"""
+Tools for scraping and plotting the results of CBGP experiments.
+
+Run `python -m cbgp_tools --help` for the command line interface. The
+library modules are:
+
+    run_log           reading a run's log and types files into a record
+    edn_types         parsing runN_types.edn files
+    compression       reading .gz, .xz and .zst logs
+    run_files         finding the runN files of a results directory
+    status            which runs finished, found solutions and generalized
+    type_counts       statistics on the runN_types.edn files
+    size_diversity    per-generation size and diversity statistics
+    success_curves    success and survival curves from the end of each log
+    experiment_index  SQLite index of whole experiments, and queries on it
+    significance      tests between every pair of configurations on every problem
+    plotter           publication plots of size_diversity output
+    aggregate_cache   on-disk cache of the plotter's per-generation aggregates
+    scan_cache        per-directory cache of what has already been scanned
+    parallel          spreading file parsing over a process pool
+    histogram         exact mergeable statistics over integers
+    shards            splitting a mass scrape into shards and merging them
+
+Nothing is imported here, so that the command line stays quick to start.
+"""
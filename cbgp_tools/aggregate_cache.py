@@ -0,0 +1,91 @@
+"""
+On-disk cache of the per-generation aggregates the plotter computes.
+
+plotter.load_stats reads a whole size-and-diversity file and groups it by
+generation, which is most of the work of a plot. Its result only depends
+on the file's contents and the statistics mode, so it is stored here under
+a hash of exactly those, and the same file used in ten comparisons (or
+copied to another directory) is only aggregated once. The cache lives in
+$CBGP_TOOLS_CACHE, or ~/.cache/cbgp_tools, and the least recently used
+entries are removed once it grows past a size limit.
+"""
+
+import hashlib
+import os
+import pickle
+
+CACHE_VERSION = 1
+
+DEFAULT_MAX_MB = 256
+
+
+def default_cache_dir():
+    if os.environ.get('CBGP_TOOLS_CACHE'):
+        return os.environ['CBGP_TOOLS_CACHE']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'cbgp_tools')
+
+
+def file_digest(file_path):
+    """A hash of the file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def entry_path(cache_dir, key):
+    return os.path.join(cache_dir, f"aggregates-v{CACHE_VERSION}-{key}.pkl")
+
+
+def load(cache_dir, key):
+    """Returns the value stored under key, or None if there is none (or it can't be read)."""
+    path = entry_path(cache_dir, key)
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+        # Mark it as recently used, for eviction
+        os.utime(path)
+        return value
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def store(cache_dir, key, value):
+    """
+    Stores value under key. Like the scan caches, this goes through a
+    temporary file, and a cache that can't be written is just skipped.
+    """
+    path = entry_path(cache_dir, key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def evict(cache_dir, max_bytes):
+    """Removes the least recently used entries until the cache is at most max_bytes."""
+    try:
+        with os.scandir(cache_dir) as it:
+            entries = [(entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+                       for entry in it if entry.name.startswith('aggregates-') and entry.is_file()]
+    except OSError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
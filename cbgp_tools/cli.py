@@ -0,0 +1,402 @@
+"""
+Command line entry point: python -m cbgp_tools <command> ...
+
+Each command imports the modules it needs only when it runs, so quick
+commands like status never load pandas or matplotlib.
+"""
+
+import argparse
+import os
+import sys
+
+
+def add_jobs_argument(parser, default=1, what="read logs with"):
+    parser.add_argument("--jobs", type=int, default=default,
+                        help=f"Number of processes to {what} (0 means one per CPU)")
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the time spent in each phase, bytes and lines read, regex hits "
+                             "and per-file latencies to stderr")
+    parser.add_argument("--profile-json", type=str, metavar="FILE",
+                        help="Also write the --profile numbers to FILE as JSON (implies --profile)")
+
+
+def start_profile(args):
+    """A profiling.Profile for this command if --profile was given, otherwise None."""
+    if not (args.profile or args.profile_json):
+        return None
+    from .profiling import Profile
+    return Profile(args.command)
+
+
+def finish_profile(profile, args):
+    if profile is None:
+        return
+    profile.print_report()
+    if args.profile_json:
+        profile.write_json(args.profile_json)
+
+
+def add_plot_arguments(parser):
+    parser.add_argument("files", type=str, nargs='*',
+                        help="CSV (or .npz) files to compare, one series each")
+    parser.add_argument("--labels", type=str, nargs='+',
+                        help="Labels for the files, in order (default Setting 1, Setting 2, ...)")
+    parser.add_argument("--label1", type=str, help="Label for first file")
+    parser.add_argument("--label2", type=str, help="Label for second file")
+    parser.add_argument("--manifest", type=str,
+                        help="Batch mode: a CSV with problem, config and file columns; "
+                             "each problem gets its own figures comparing its configs")
+    parser.add_argument("--success", action="store_true",
+                        help="The files were written by the success command: plot each problem's success "
+                             "and survival curves, one series per file")
+    parser.add_argument("--prefix", type=str, default="plot", help="Output filename prefix")
+    parser.add_argument("--stats", type=str, choices=['mean', 'median'], default='mean',
+                        help="Choose 'mean' or 'median'")
+    parser.add_argument("--force", action="store_true",
+                        help="Redraw every figure, even those whose data and style haven't changed")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't read or write the cache of per-generation aggregates")
+    parser.add_argument("--cache-dir", type=str,
+                        help="Where to keep the aggregate cache (default $CBGP_TOOLS_CACHE or ~/.cache/cbgp_tools)")
+    parser.add_argument("--cache-size", type=int, default=256, metavar="MB",
+                        help="Remove the least recently used aggregates beyond this size (default 256)")
+    parser.add_argument("--chunk-rows", type=int, metavar="N",
+                        help="Stream each data file N rows at a time, keeping only per-generation aggregates "
+                             "(0 reads files whole; by default only files over 1 GB are streamed)")
+    parser.add_argument("--no-lod", action="store_true",
+                        help="Draw every generation, instead of decimating long series to the output resolution "
+                             "(keeping each bucket's minimum and maximum)")
+    parser.add_argument("--rasterize-bands", action="store_true",
+                        help="Draw the error bands as images in the PDFs, keeping lines, axes and text vector")
+    add_jobs_argument(parser, default=0, what="load data and render figures with")
+
+
+def cmd_status(args):
+    from . import parallel, status
+
+    if args.watch is not None:
+        ignored = [option for option, given in (("--csv", args.csv), ("--mmap", args.mmap),
+                                                ("--no-cache", args.no_cache), ("--jobs", args.jobs != 1),
+                                                ("--profile", args.profile or args.profile_json))
+                   if given]
+        if ignored:
+            sys.exit(f"Error: --watch can't be combined with {', '.join(ignored)}")
+        status.watch(args.directory, args.watch)
+        return
+    profile = start_profile(args)
+    status.scrape_and_print(args.directory, not args.brief, args.csv, args.mmap,
+                            not args.no_cache, parallel.resolve_jobs(args.jobs), profile)
+    finish_profile(profile, args)
+
+
+def cmd_types(args):
+    from . import parallel, type_counts
+
+    profile = start_profile(args)
+    type_counts.scrape_and_print(args.directory, not args.brief, args.csv,
+                                 parallel.resolve_jobs(args.jobs), profile)
+    finish_profile(profile, args)
+
+
+def cmd_sizes(args):
+    from . import parallel, size_diversity
+
+    if args.stream and args.format != 'csv':
+        sys.exit("Error: --stream only supports --format csv")
+    gens = None
+    if args.gens is not None:
+        try:
+            gens = size_diversity.parse_gens(args.gens)
+        except ValueError as e:
+            sys.exit(f"Error: bad --gens: {e}")
+    output_name = args.output or size_diversity.output_name_for(args.folder, args.format)
+    profile = start_profile(args)
+    try:
+        size_diversity.parse_logs(args.folder, output_name, use_cache=not args.no_cache,
+                                  jobs=parallel.resolve_jobs(args.jobs),
+                                  output_format=args.format, stream=args.stream, profile=profile,
+                                  gens=gens)
+    except OSError as e:
+        sys.exit(f"Error: {e}")
+    finish_profile(profile, args)
+
+
+def print_problem(kind, full, results):
+    """Prints (and for sizes, writes the CSV of) one problem's line of the mass output."""
+    from . import size_diversity, status, type_counts
+
+    if kind == 'sizes':
+        # The full parse also found each run's status, so lay the records
+        # out the way status.scrape does
+        by_run = {int(record['run']): record for record in results}
+        runs = [status.MISSING if i not in by_run else by_run[i] if by_run[i]['size'] > 0 else None
+                for i in range(max(by_run, default=-1) + 1)]
+        status.print_runs(full, runs, True)
+        size_diversity.write_rows(results, size_diversity.output_name_for(full))
+    elif kind == 'types':
+        type_counts.print_counts(full, results, True)
+    else:
+        status.print_runs(full, results, True)
+
+
+def cmd_mass(args):
+    from . import parallel, profiling, shards, size_diversity, status, type_counts
+
+    jobs = parallel.resolve_jobs(args.jobs)
+    parent_dir = args.parent_dir
+    kind = 'sizes' if args.sizes else 'types' if args.types else 'status'
+    select = None
+    if args.shard is not None:
+        try:
+            shard = shards.parse_shard(args.shard)
+        except ValueError as e:
+            sys.exit(f"Error: bad --shard: {e}")
+        select = shards.selector(shard)
+    profile = start_profile(args)
+
+    with profiling.phase(profile, 'listdir'):
+        problem_dirs = [prob for prob in os.listdir(parent_dir)
+                        if os.path.isdir(os.path.join(parent_dir, prob))]
+    problem_dirs.sort()
+
+    full_dirs = [os.path.join(parent_dir, prob, "") for prob in problem_dirs]
+
+    # All runs of all problems are read in one pool, and the results come back
+    # in problem order, so the output is the same as a serial scrape
+    if kind == 'sizes':
+        all_results = size_diversity.scrape(full_dirs, jobs=jobs, profile=profile, select=select)
+    elif kind == 'types':
+        all_results = type_counts.scrape(full_dirs, jobs, profile, select)
+    else:
+        all_results = status.scrape(full_dirs, jobs=jobs, profile=profile, select=select)
+
+    with profiling.phase(profile, 'output'):
+        if select is not None:
+            partial = args.partial or f"partial-{shard[0]}-of-{shard[1]}.json.gz"
+            shards.write_partial(partial, kind, shard, full_dirs, all_results)
+            print(f"Wrote shard {shard[0]}/{shard[1]} of {len(full_dirs)} problems to {partial}",
+                  file=sys.stderr)
+        else:
+            for full, results in zip(full_dirs, all_results):
+                print_problem(kind, full, results)
+
+    finish_profile(profile, args)
+
+
+def cmd_success(args):
+    from . import parallel, success_curves
+
+    profile = start_profile(args)
+    try:
+        success_curves.scrape_and_write(args.directories, args.output, not args.no_cache,
+                                        parallel.resolve_jobs(args.jobs), profile)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    finish_profile(profile, args)
+
+
+def cmd_merge(args):
+    from . import shards
+
+    try:
+        kind, directories, all_results, missing = shards.merge_partials(args.partials)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    if missing:
+        print(f"Warning: no partial for shard(s) {', '.join(map(str, missing))}; "
+              "their runs are missing from the results", file=sys.stderr)
+
+    for full, results in zip(directories, all_results):
+        print_problem(kind, full, results)
+
+
+def cmd_index(args):
+    from . import experiment_index, parallel
+
+    def on_file(done, total, filename, error):
+        if error is not None:
+            print(f"Error reading file {filename}: {error}", file=sys.stderr)
+
+    try:
+        directories, runs, changed = experiment_index.index(args.database, args.directories,
+                                                            parallel.resolve_jobs(args.jobs), on_file)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    print(f"Indexed {runs} runs in {directories} directories into {args.database} "
+          f"({changed} logs read, the rest unchanged)")
+
+
+def cmd_query(args):
+    import csv
+    import sqlite3
+    from . import experiment_index
+
+    if args.question == 'problems':
+        params = {'finished_below': args.finished_below}
+    elif args.question == 'generation':
+        if args.generation is None:
+            sys.exit("Error: the generation query needs --generation")
+        params = {'generation': args.generation, 'metric': args.metric}
+    elif args.question == 'sql':
+        if args.sql is None:
+            sys.exit("Error: the sql query needs --sql")
+        params = {'sql': args.sql}
+    else:
+        params = {}
+
+    try:
+        header, rows = experiment_index.query(args.database, args.question, **params)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    except sqlite3.Error as e:
+        sys.exit(f"SQL error: {e}")
+
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(rows)
+
+
+def cmd_stats(args):
+    import csv
+    import sqlite3
+    from . import significance
+
+    try:
+        header, rows = significance.compare(args.database, args.metrics, args.correction)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    except sqlite3.Error as e:
+        sys.exit(f"SQL error: {e}")
+
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(rows)
+
+
+def cmd_plot(args):
+    from . import plotter
+
+    try:
+        plotter.run(args)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cbgp_tools",
+                                     description="Scrape and plot the results of CBGP experiments.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("status", help="Which runs in a results directory finished, found solutions and generalized")
+    p.add_argument("directory", nargs='?', default='.', help="Results directory (defaults to current dir)")
+    p.add_argument("--brief", action="store_true", help="Accepted for compatibility; the output is the same")
+    p.add_argument("--csv", action="store_true", help="Print one line, ready to paste into a spreadsheet")
+    p.add_argument("--mmap", action="store_true", help="Read the end of each log through a memory map instead of block reads")
+    p.add_argument("--no-cache", action="store_true", help="Ignore and don't update the .status_cache.json file")
+    p.add_argument("--watch", type=float, nargs='?', const=5.0, metavar="SECONDS",
+                   help="Keep the per-run table on screen and redraw it as the runs progress")
+    add_jobs_argument(p)
+    add_profile_arguments(p)
+    p.set_defaults(func=cmd_status)
+
+    p = commands.add_parser("types", help="Statistics on the runN_types.edn files in a results directory")
+    p.add_argument("directory", nargs='?', default='.', help="Results directory (defaults to current dir)")
+    p.add_argument("--brief", action="store_true", help="Accepted for compatibility; the output is the same")
+    p.add_argument("--csv", action="store_true", help="Print a header and one line, ready to paste into a spreadsheet")
+    add_jobs_argument(p)
+    add_profile_arguments(p)
+    p.set_defaults(func=cmd_types)
+
+    p = commands.add_parser("sizes", help="Scrape per-generation size and diversity statistics to a CSV")
+    p.add_argument("folder", type=str, nargs='?', default='.',
+                   help="Path to the folder containing runN.txt files (defaults to current dir)")
+    p.add_argument("-o", "--output", type=str,
+                   help="Output file (defaults to <parent>-<folder>-size-and-diversity.<format>)")
+    p.add_argument("--format", type=str, choices=['csv', 'npz'], default='csv',
+                   help="Write a CSV, or a typed columnar NumPy .npz archive that the plotter loads directly")
+    p.add_argument("--stream", action="store_true",
+                   help="Write each run's rows as soon as it is parsed, with memory bounded by a single run (CSV only, bypasses the cache)")
+    p.add_argument("--no-cache", action="store_true",
+                   help="Re-parse every log from the start instead of using the .size_and_diversity_cache.json "
+                        "and .generation_index_cache.json files")
+    p.add_argument("--gens", type=str, metavar="START:STOP:STEP",
+                   help="Only these generations, e.g. 0:1000:10 for every 10th of the first 1000; "
+                        "with a generation index from an earlier scan, the skipped ones aren't read at all")
+    add_jobs_argument(p)
+    add_profile_arguments(p)
+    p.set_defaults(func=cmd_sizes)
+
+    p = commands.add_parser("mass", help="Print one CSV line per problem directory")
+    p.add_argument("parent_dir", help="Directory containing one results directory per problem")
+    p.add_argument("--types", action="store_true",
+                   help="Print type statistics instead of solution counts")
+    p.add_argument("--sizes", action="store_true",
+                   help="Also write each problem's size-and-diversity CSV, from the same single read of every log")
+    p.add_argument("--shard", type=str, metavar="I/N",
+                   help="Only scrape shard I of N (a fixed subset of every problem's runs) "
+                        "and write the results to a partial file for merge instead of printing them")
+    p.add_argument("--partial", type=str, metavar="FILE",
+                   help="Where --shard writes its results (default partial-I-of-N.json.gz)")
+    add_jobs_argument(p)
+    add_profile_arguments(p)
+    p.set_defaults(func=cmd_mass)
+
+    p = commands.add_parser("success", help="Success and survival curves over generations, from the end of each log only")
+    p.add_argument("directories", nargs='+',
+                   help="Results directories, named after their problem, in directories named after their configuration")
+    p.add_argument("-o", "--output", type=str, help="Output CSV file (defaults to stdout), for plot --success")
+    p.add_argument("--no-cache", action="store_true", help="Ignore and don't update the .status_cache.json files")
+    add_jobs_argument(p)
+    add_profile_arguments(p)
+    p.set_defaults(func=cmd_success)
+
+    p = commands.add_parser("merge", help="Combine the partial files of a sharded mass scrape and print its output")
+    p.add_argument("partials", nargs='+', help="Partial files written by mass --shard")
+    p.set_defaults(func=cmd_merge)
+
+    p = commands.add_parser("index", help="Add results directories to a SQLite index, re-reading only logs that changed")
+    p.add_argument("database", help="SQLite file to create or update")
+    p.add_argument("directories", nargs='+',
+                   help="Results directories, or directories to search for them")
+    add_jobs_argument(p)
+    p.set_defaults(func=cmd_index)
+
+    p = commands.add_parser("query", help="Answer questions from a SQLite index without reading any logs")
+    p.add_argument("database", help="SQLite file written by the index command")
+    p.add_argument("question", choices=['problems', 'success', 'generation', 'sql'],
+                   help="problems: run counts per problem; success: success rates per configuration; "
+                        "generation: a metric at one generation per problem; sql: run --sql")
+    p.add_argument("--finished-below", type=int, metavar="N",
+                   help="problems: only list problems with fewer than N finished runs")
+    p.add_argument("--generation", type=int, help="generation: which generation")
+    p.add_argument("--metric", default="genomeSizeMedian",
+                   choices=['codeSizeMean', 'codeSizeMedian', 'genomeSizeMean', 'genomeSizeMedian', 'uniqueBehaviors'],
+                   help="generation: which column (default genomeSizeMedian)")
+    p.add_argument("--sql", help="sql: the statement to run (tables: directories, runs, generations)")
+    p.set_defaults(func=cmd_query)
+
+    p = commands.add_parser("stats", help="Significance tests between every pair of configurations on every problem")
+    p.add_argument("database", help="SQLite file written by the index command")
+    p.add_argument("--metrics", nargs='*', metavar="METRIC",
+                   default=['codeSizeMean', 'genomeSizeMean', 'uniqueBehaviors'],
+                   choices=['codeSizeMean', 'codeSizeMedian', 'genomeSizeMean', 'genomeSizeMedian', 'uniqueBehaviors'],
+                   help="Final-generation metrics to compare with Mann-Whitney U tests "
+                        "(default codeSizeMean genomeSizeMean uniqueBehaviors)")
+    p.add_argument("--correction", choices=['holm', 'bh', 'bonferroni', 'none'], default='holm',
+                   help="Multiple-comparison correction applied to each test across all problems and pairs "
+                        "(default holm; bh is Benjamini-Hochberg)")
+    p.set_defaults(func=cmd_stats)
+
+    p = commands.add_parser("plot", help="Plot size-and-diversity files against each other")
+    add_plot_arguments(p)
+    p.set_defaults(func=cmd_plot)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
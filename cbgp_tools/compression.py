@@ -0,0 +1,52 @@
+"""
+Reading run logs and types files that have been compressed.
+
+Finished experiments are often archived as run3.txt.gz, run3.txt.xz or
+run3.txt.zst (and the same for runN_types.edn). open_log hides the
+difference: it returns a binary file object that decompresses as it is
+read, so a compressed log is never written out or held in memory whole.
+gzip and xz come with Python; .zst files need the zstandard package.
+"""
+
+import gzip
+import io
+import lzma
+
+COMPRESSED_SUFFIXES = ('.gz', '.xz', '.zst')
+
+
+def is_compressed(file_path):
+    return file_path.endswith(COMPRESSED_SUFFIXES)
+
+
+def open_log(file_path):
+    """Opens file_path for reading bytes, decompressing on the fly if needed."""
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, 'rb')
+    if file_path.endswith('.xz'):
+        return lzma.open(file_path, 'rb')
+    if file_path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(f"Reading {file_path} needs the zstandard package "
+                               "(pip install zstandard)") from None
+        reader = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'),
+                                                             read_across_frames=True,
+                                                             closefd=True)
+        return io.BufferedReader(reader)
+    return open(file_path, 'rb')
+
+
+def is_empty(file_path, size):
+    """
+    Whether the file holds no data once decompressed, given its size on
+    disk. Only the first block of a compressed file is decompressed.
+    """
+    if size == 0:
+        return True
+    if not is_compressed(file_path):
+        return False
+    with open_log(file_path) as f:
+        return not f.read(1)
+
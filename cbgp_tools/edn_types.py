@@ -0,0 +1,138 @@
+"""
+Reader for runN_types.edn files.
+
+These files hold one EDN vector of [type frequency] pairs, where a type can
+itself be any EDN value (keywords, maps, vectors, strings...). Rather than
+relying on the one-pair-per-line layout they happen to be printed in, the
+reader works on the raw bytes, a chunk at a time: one compiled pattern
+finds every square bracket, string, comment and character literal, which
+is enough to track vector nesting and cut out each pair, and the frequency
+is the last token of its pair.
+Square brackets are balanced inside any well-formed EDN value, so maps
+and lists inside the types don't need to be tracked at all, which keeps
+the number of tokens the Python loop sees to about two per pair.
+"""
+
+import itertools
+import re
+from array import array
+
+from .compression import open_log
+
+# Square brackets change the depth, while strings, comments and character
+# literals (\[, \", ...) are matched whole so that brackets and quotes
+# inside them are skipped. A string with no closing quote (yet) runs to the
+# end of what is being tokenized, and 'open' tells it apart from a whole one
+_token_pattern = re.compile(rb'"(?:\\.|[^"\\])*(?:"|(?P<open>\\?\Z))|;[^\n]*|\\.|[\[\]]', re.DOTALL)
+
+_OPEN = ord('[')
+_CLOSE = ord(']')
+_QUOTE = ord('"')
+
+# Commas are whitespace in EDN
+_EDN_WHITESPACE = b" \t\r\n,"
+
+# How much of a types file is read at a time
+CHUNK_SIZE = 1 << 20
+
+
+class EdnError(ValueError):
+    pass
+
+
+def parse_chunks(chunks):
+    """
+    Parses a types file given as an iterable of bytes chunks into (names,
+    counts), as parse_type_freqs does. Each round only tokenizes up to the
+    last newline read so far: no comment or character literal can run past
+    a newline, so the only token that can be cut short there is a string,
+    which its 'open' group gives away, and it is left for the next round
+    along with the pair it is in. So apart from the results, only about a
+    chunk is held in memory (a file with no newlines at all is held whole).
+    """
+    names = []
+    counts = array('q')
+
+    data = b""
+    pos = 0          # where tokenizing picks up again
+    base = 0         # offset in the file of data[0], for error messages
+    depth = 0
+    entry_start = None
+
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        if final:
+            end = len(data)
+        else:
+            data += chunk
+            end = data.rfind(b"\n", pos) + 1
+            if end == 0:
+                continue
+
+        resume = end
+        for match in _token_pattern.finditer(data, pos, end):
+            char = data[match.start()]
+            if char == _OPEN:
+                depth += 1
+                if depth == 2:
+                    entry_start = match.end()
+            elif char == _CLOSE:
+                if depth == 2:
+                    entry = data[entry_start:match.start()].rstrip(_EDN_WHITESPACE)
+                    parts = entry.rsplit(None, 1)
+                    if len(parts) != 2:
+                        raise EdnError(f"malformed pair {entry[:80]!r}")
+                    try:
+                        counts.append(int(parts[1]))
+                    except ValueError:
+                        raise EdnError(f"frequency {parts[1][:80]!r} is not an integer") from None
+                    names.append(parts[0].strip(_EDN_WHITESPACE).decode('utf-8'))
+                depth -= 1
+                if depth < 0:
+                    raise EdnError(f"unbalanced ] at byte {base + match.start()}")
+            elif char == _QUOTE and match.group('open') is not None:
+                if final:
+                    raise EdnError(f"file ends inside a string starting at byte {base + match.start()}")
+                resume = match.start()
+                break
+        pos = resume
+
+        # Drop what has been dealt with, keeping the pair being read
+        keep = min(pos, entry_start) if depth >= 2 else pos
+        data = data[keep:]
+        pos -= keep
+        base += keep
+        if entry_start is not None:
+            entry_start -= keep
+
+    if depth != 0:
+        raise EdnError("file ends inside a vector")
+    return names, counts
+
+
+def parse_type_freqs(data):
+    """
+    Parses the contents of a types file. Returns (names, counts): a list of
+    the types as EDN text and a parallel array of their frequencies.
+    """
+    return parse_chunks([data])
+
+
+def read_type_freqs(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Reads a runN_types.edn file into (names, counts) as parse_type_freqs
+    does, or returns None if the file is empty. The file may be compressed,
+    and is read chunk_size bytes at a time, so the whole file is never in
+    memory at once.
+    """
+    blank = True
+
+    def chunks(f):
+        nonlocal blank
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            blank = blank and not chunk.strip()
+            yield chunk
+
+    with open_log(file_path) as f:
+        parsed = parse_chunks(chunks(f))
+    return None if blank else parsed
@@ -0,0 +1,321 @@
+"""
+A SQLite index of whole experiments, so questions about them can be
+answered without reading any logs.
+
+index() walks one or more directory trees for results directories (any
+directory holding runN.txt logs) and stores, for every run, its outcome
+and last generation, and for every generation its size and diversity row.
+Each results directory is identified by its path, with the directory's
+own name as the problem and its parent's name as the configuration, the
+same layout mass_scraper expects. Re-indexing only opens logs whose
+inode, size or mtime changed, and a log that has only grown is parsed
+from its last STARTING line on, as the scan caches do. The STARTING
+offsets found along the way go into each directory's generation index,
+the one sizes --gens seeks with (see size_diversity).
+
+query() runs one of the canned QUERIES, or any SQL, against the index,
+which it opens read-only.
+"""
+
+import os
+import pathlib
+import sqlite3
+import statistics
+
+from . import parallel, run_files, run_log, scan_cache
+from .size_diversity import GEN_INDEX_NAME, find_logs, index_entry
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE directories (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    config TEXT NOT NULL,
+    problem TEXT NOT NULL
+);
+CREATE INDEX directories_by_config ON directories (config, problem);
+
+-- solution is NULL while a run is going, and 0 or 1 once it has finished
+CREATE TABLE runs (
+    directory_id INTEGER NOT NULL REFERENCES directories (id),
+    run INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    generation INTEGER,
+    solution INTEGER,
+    generalized INTEGER NOT NULL,
+    PRIMARY KEY (directory_id, run)
+);
+
+CREATE TABLE generations (
+    directory_id INTEGER NOT NULL,
+    run INTEGER NOT NULL,
+    generation INTEGER NOT NULL,
+    codeSizeMean REAL,
+    codeSizeMedian REAL,
+    genomeSizeMean REAL,
+    genomeSizeMedian REAL,
+    uniqueBehaviors INTEGER,
+    PRIMARY KEY (directory_id, run, generation)
+) WITHOUT ROWID;
+CREATE INDEX generations_by_generation ON generations (directory_id, generation);
+"""
+
+METRICS = run_log.ROW_FIELDS[2:]
+
+
+def connect(db_path):
+    """
+    Opens the index at db_path for writing, creating it (or recreating an
+    out-of-date one) as needed. Only index() should call this: a SQLite
+    file that isn't an index is refused rather than overwritten.
+    """
+    conn = sqlite3.connect(db_path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        has_tables = conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] > 0
+        if version == 0 and has_tables:
+            conn.close()
+            raise ValueError(f"{db_path} is a SQLite database but not a cbgp_tools index")
+        with conn:
+            for table in ("generations", "runs", "directories"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def connect_read_only(db_path):
+    """
+    Opens the index at db_path so that nothing, not even a --sql statement,
+    can change it. An index of another schema version is an error; the
+    index command brings it up to date.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No index at {db_path}; build one with the index command first")
+    conn = sqlite3.connect(pathlib.Path(db_path).absolute().as_uri() + "?mode=ro", uri=True)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        conn.close()
+        if version == 0:
+            raise ValueError(f"{db_path} is not a cbgp_tools index")
+        raise ValueError(f"{db_path} is an index of schema version {version}, not {SCHEMA_VERSION}; "
+                         "run the index command on it again")
+    return conn
+
+
+def find_result_dirs(paths):
+    """Returns every directory under paths (including themselves) that holds run logs, sorted."""
+    pattern = run_files.run_file_pattern("run", ".txt")
+    found = set()
+    for path in paths:
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            if any(pattern.match(name) for name in filenames):
+                found.add(os.path.abspath(dirpath))
+    return sorted(found)
+
+
+def parse_run(file_path, run_number, st, known):
+    """
+    Parses one log for the index. known is the run's stored signature and
+    offset (or None); if the log has only grown since then, parsing starts
+    at that offset and the record's rows are just the generations from
+    there on. Returns (record, error message or None).
+    """
+    try:
+        record = run_log.new_record(run_number)
+        offset = known['offset'] if scan_cache.has_grown(known, st) else 0
+        run_log.parse_log(file_path, record, offset)
+        record.update(scan_cache.file_signature(st))
+        record['resumed'] = offset > 0
+        return record, None
+    except Exception as e:
+        return None, str(e)
+
+
+def _number(value, kind=float):
+    value = run_log.to_float(value)
+    return None if value != value else kind(value)
+
+
+def _store_run(conn, directory_id, file_name, record):
+    run = int(record['run'])
+    if record['resumed'] and record['rows']:
+        conn.execute("DELETE FROM generations WHERE directory_id = ? AND run = ? AND generation >= ?",
+                     (directory_id, run, int(record['rows'][0]['generation'])))
+    else:
+        conn.execute("DELETE FROM generations WHERE directory_id = ? AND run = ?", (directory_id, run))
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(directory_id, run, int(row['generation']),
+          _number(row['codeSizeMean']), _number(row['codeSizeMedian']),
+          _number(row['genomeSizeMean']), _number(row['genomeSizeMedian']),
+          _number(row['uniqueBehaviors'], int))
+         for row in record['rows']])
+
+    generation = record['generation']
+    solution = record['solution']
+    conn.execute(
+        "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (directory_id, run, file_name, record['inode'], record['size'], record['mtime'],
+         record['offset'], None if generation is None else int(generation),
+         None if solution is None else int(solution), int(record['generalized'])))
+
+
+def _update_gen_index(gen_index, file_name, record, known):
+    """
+    Puts the STARTING offsets of a record parse_run returned into the
+    generation index. A resumed record only has the offsets from known's
+    on, so it is only indexed if the index entry describes the same file
+    as known; otherwise the entry is left as it is, since it still
+    describes an earlier part of the same log.
+    """
+    if not record['resumed']:
+        gen_index[file_name] = index_entry(record)
+        return
+    entry = gen_index.get(file_name)
+    if entry is not None and entry['starts'] and \
+            all(entry.get(key) == known[key] for key in ('inode', 'size', 'mtime')):
+        gen_index[file_name] = dict(index_entry(record), starts=entry['starts'][:-1] + record['starts'])
+
+
+def index(db_path, paths, jobs=1, on_file=None):
+    """
+    Brings the index at db_path up to date with every results directory
+    under paths. Runs whose logs have disappeared are dropped. on_file, if
+    given, is called as on_file(done, total, filename, error) after each
+    log that had to be read. Returns (directories, runs, runs re-read).
+    Each directory's generation index is brought up to date with the logs
+    that were read.
+    """
+    conn = connect(db_path)
+    directories = find_result_dirs(paths)
+    tasks = []
+    gen_indexes = []
+    num_runs = 0
+
+    with conn:
+        for directory in directories:
+            conn.execute("INSERT OR IGNORE INTO directories (path, config, problem) VALUES (?, ?, ?)",
+                         (directory, os.path.basename(os.path.dirname(directory)),
+                          os.path.basename(directory)))
+            directory_id = conn.execute("SELECT id FROM directories WHERE path = ?",
+                                        (directory,)).fetchone()[0]
+            known = {run: {'inode': inode, 'size': size, 'mtime': mtime, 'offset': offset, 'file': file_name}
+                     for run, file_name, inode, size, mtime, offset in conn.execute(
+                         "SELECT run, file, inode, size, mtime, offset FROM runs WHERE directory_id = ?",
+                         (directory_id,))}
+
+            logs = find_logs(directory)
+            num_runs += len(logs)
+            gen_index = None
+            for file_path, run_number, st in logs:
+                file_name = os.path.basename(file_path)
+                entry = known.get(int(run_number))
+                if entry is not None and entry['file'] == file_name and scan_cache.is_unchanged(entry, st):
+                    continue
+                if entry is not None and entry['file'] != file_name:
+                    entry = None
+                if gen_index is None:
+                    gen_index = scan_cache.load_cache(directory, GEN_INDEX_NAME)
+                    gen_indexes.append((directory, gen_index))
+                tasks.append((directory_id, file_name, gen_index, (file_path, run_number, st, entry)))
+
+            gone = set(known) - {int(run_number) for _, run_number, _ in logs}
+            for run in gone:
+                conn.execute("DELETE FROM generations WHERE directory_id = ? AND run = ?", (directory_id, run))
+                conn.execute("DELETE FROM runs WHERE directory_id = ? AND run = ?", (directory_id, run))
+
+        results = parallel.pool_imap(parse_run, [task[3] for task in tasks], jobs,
+                                     max_pending=4 * max(jobs, 1))
+        for i, ((directory_id, file_name, gen_index, args), (record, error)) in enumerate(zip(tasks, results)):
+            if error is None:
+                _store_run(conn, directory_id, file_name, record)
+                _update_gen_index(gen_index, file_name, record, args[3])
+            if on_file is not None:
+                on_file(i + 1, len(tasks), file_name, error)
+
+    for directory, gen_index in gen_indexes:
+        scan_cache.save_cache(directory, GEN_INDEX_NAME, gen_index)
+
+    conn.close()
+    return len(directories), num_runs, len(tasks)
+
+
+def query_problems(conn, finished_below=None):
+    """Runs, finished runs, solutions and generalized solutions for each problem."""
+    sql = """
+        SELECT d.config, d.problem, d.path, COUNT(r.run),
+               COUNT(r.solution), COALESCE(SUM(r.solution), 0), COALESCE(SUM(r.generalized), 0)
+        FROM directories d LEFT JOIN runs r ON r.directory_id = d.id
+        GROUP BY d.id
+    """
+    params = ()
+    if finished_below is not None:
+        sql += " HAVING COUNT(r.solution) < ?"
+        params = (finished_below,)
+    sql += " ORDER BY d.config, d.problem"
+    header = ["config", "problem", "path", "runs", "finished", "solutions", "generalized"]
+    return header, conn.execute(sql, params).fetchall()
+
+
+def query_success(conn):
+    """Success and generalization rates (out of all runs) for each configuration."""
+    rows = conn.execute("""
+        SELECT d.config, COUNT(DISTINCT d.id), COUNT(r.run), COUNT(r.solution),
+               COALESCE(SUM(r.solution), 0), COALESCE(SUM(r.generalized), 0)
+        FROM directories d LEFT JOIN runs r ON r.directory_id = d.id
+        GROUP BY d.config ORDER BY d.config
+    """).fetchall()
+    header = ["config", "problems", "runs", "finished", "solutions", "generalized",
+              "successRate", "generalizationRate"]
+    return header, [row + ((row[4] / row[2], row[5] / row[2]) if row[2] else (None, None))
+                    for row in rows]
+
+
+def query_generation(conn, generation, metric):
+    """The mean and median of one metric over each problem's runs at one generation."""
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+
+    values = {}
+    for config, problem, value in conn.execute(f"""
+            SELECT d.config, d.problem, g.{metric}
+            FROM generations g JOIN directories d ON d.id = g.directory_id
+            WHERE g.generation = ? AND g.{metric} IS NOT NULL
+            ORDER BY d.config, d.problem""", (generation,)):
+        values.setdefault((config, problem), []).append(value)
+
+    header = ["config", "problem", "generation", "runs", metric + "Mean", metric + "Median"]
+    return header, [(config, problem, generation, len(vals), statistics.fmean(vals), statistics.median(vals))
+                    for (config, problem), vals in values.items()]
+
+
+def query_sql(conn, sql):
+    """Any SQL statement against the index."""
+    cursor = conn.execute(sql)
+    header = [column[0] for column in cursor.description or ()]
+    return header, cursor.fetchall()
+
+
+QUERIES = {
+    'problems': query_problems,
+    'success': query_success,
+    'generation': query_generation,
+    'sql': query_sql,
+}
+
+
+def query(db_path, name, **params):
+    """Runs QUERIES[name] against the index at db_path and returns (header, rows)."""
+    conn = connect_read_only(db_path)
+    try:
+        return QUERIES[name](conn, **params)
+    finally:
+        conn.close()
@@ -0,0 +1,97 @@
+"""
+Exact streaming statistics over integers.
+
+An IntHistogram keeps a count per distinct value instead of every value,
+so its memory is bounded by how many different values turn up rather than
+how many are added. Histograms built in separate worker processes merge
+into exactly the histogram a single pass would have built, and medians and
+quantiles come out the same as from the full sorted list.
+"""
+
+from collections import Counter
+
+
+class IntHistogram:
+
+    def __init__(self, values=()):
+        self.counts = Counter()
+        self.total = 0
+        self.update(values)
+
+    def add(self, value, count=1):
+        self.counts[value] += count
+        self.total += count
+
+    def update(self, values):
+        for value in values:
+            self.counts[value] += 1
+            self.total += 1
+
+    def merge(self, other):
+        """Adds all of other's values to this histogram, and returns it."""
+        self.counts.update(other.counts)
+        self.total += other.total
+        return self
+
+    def __len__(self):
+        return self.total
+
+    def count_at_least(self, threshold):
+        """How many values are >= threshold."""
+        return sum(count for value, count in self.counts.items() if value >= threshold)
+
+    def mean(self):
+        """The mean value, or False if the histogram is empty (like the old mean())."""
+        if self.total <= 0:
+            return False
+        return sum(value * count for value, count in self.counts.items()) / float(self.total)
+
+    def _value_at(self, position, items):
+        """The value at a 0-based position in sorted order, walking items in order."""
+        seen = 0
+        for value, count in items:
+            seen += count
+            if position < seen:
+                return value
+        raise IndexError(position)
+
+    def quantile(self, q):
+        """
+        The q-th quantile, interpolating linearly between the two closest
+        values like numpy.quantile does. False if the histogram is empty.
+        """
+        if self.total <= 0:
+            return False
+        items = sorted(self.counts.items())
+        position = q * (self.total - 1)
+        lower = int(position)
+        low_value = self._value_at(lower, items)
+        if position == lower:
+            return low_value
+        high_value = self._value_at(lower + 1, items)
+        return low_value + (high_value - low_value) * (position - lower)
+
+    def median(self):
+        """
+        The median, or False if the histogram is empty. Like the old median()
+        on a list, an even number of values gives the float average of the
+        two middle ones.
+        """
+        if self.total <= 0:
+            return False
+        items = sorted(self.counts.items())
+        if not self.total % 2:
+            return (self._value_at(self.total // 2, items) +
+                    self._value_at(self.total // 2 - 1, items)) / 2.0
+        return self._value_at(self.total // 2, items)
+
+    def to_dict(self):
+        """A JSON-friendly form of the histogram (JSON object keys must be strings)."""
+        return {str(value): count for value, count in self.counts.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        for value, count in data.items():
+            histogram.add(int(value), count)
+        return histogram
@@ -0,0 +1,59 @@
+"""
+Helpers for spreading per-file log parsing over a pool of processes.
+"""
+
+import collections
+import os
+
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+
+def resolve_jobs(jobs):
+    """A --jobs value of 0 (or less) means one job per CPU."""
+    return jobs if jobs > 0 else default_jobs()
+
+
+def pool_map(func, args_list, jobs=1):
+    """
+    Returns [func(*args) for args in args_list], computed over jobs worker
+    processes. Results always come back in the order of args_list, so the
+    output doesn't depend on how the work was scheduled.
+    """
+    return list(pool_imap(func, args_list, jobs))
+
+
+def pool_imap(func, args_list, jobs=1, max_pending=None):
+    """
+    Like pool_map, but yields each result as soon as it and all the results
+    before it are ready. With jobs <= 1, or nothing worth farming out,
+    everything runs lazily in this process. If max_pending is given, at most
+    that many calls are handed to the pool ahead of the consumer, so results
+    that haven't been used yet can't pile up in memory.
+    """
+    args_list = list(args_list)
+    if jobs <= 1 or len(args_list) <= 1:
+        for args in args_list:
+            yield func(*args)
+        return
+
+    # Imported here so that commands that never start a pool don't pay for it
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = min(jobs, len(args_list))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        if max_pending is None:
+            # Hand each worker several files at a time so that small logs don't
+            # spend more time in inter-process overhead than in parsing
+            chunksize = max(1, len(args_list) // (jobs * 4))
+            yield from executor.map(func, *zip(*args_list), chunksize=chunksize)
+            return
+
+        pending = collections.deque()
+        for args in args_list:
+            if len(pending) >= max(max_pending, jobs):
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, *args))
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,844 @@
+import csv
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+import matplotlib
+# Figures are made with the Figure class rather than pyplot: they are only
+# ever written to files, so they need no backend, and importing this module
+# leaves the caller's backend and style alone
+from matplotlib.figure import Figure
+import sys
+import os
+import warnings
+import zipfile
+
+from . import aggregate_cache, parallel, scan_cache
+
+# --- Publication Style Settings ---
+PUBLICATION_STYLE = {
+    'font.size': 14,
+    'axes.labelsize': 16,
+    'axes.titlesize': 18,
+    'xtick.labelsize': 14,
+    'ytick.labelsize': 14,
+    'legend.fontsize': 14,
+    'lines.linewidth': 2.5,
+    'grid.alpha': 0.4
+}
+
+# Bump this when render_figure changes how figures look, so existing PDFs
+# aren't taken to be up to date
+FIGURE_VERSION = 1
+
+# Name of the scan_cache file in images/ recording what each PDF was drawn from
+STAMPS_NAME = "plot"
+
+METRIC_COLUMNS = ['codeSizeMean', 'codeSizeMedian', 'genomeSizeMean', 'genomeSizeMedian', 'uniqueBehaviors']
+
+# Files bigger than this are aggregated in chunks of DEFAULT_CHUNK_ROWS rows
+# unless told otherwise, since reading them whole may not fit in memory
+CHUNKED_ABOVE_BYTES = 1 << 30
+DEFAULT_CHUNK_ROWS = 1000000
+
+# In chunked mode the quartiles are narrowed down a pass at a time by
+# histogramming the values that could still be one into QUANTILE_BINS
+# bins, until there are no more than QUANTILE_CANDIDATES of them to sort
+QUANTILE_BINS = 64
+QUANTILE_CANDIDATES = 256
+
+FIGURE_SIZE = (10, 6)
+SAVE_DPI = 300
+
+# Long series are decimated to this many buckets, one per pixel of the
+# figure's width at SAVE_DPI, so the axes get at least one per pixel
+LOD_BUCKETS = int(FIGURE_SIZE[0] * SAVE_DPI)
+
+def parse_fraction(val):
+    """Handle values that might be floats, ints, or Clojure fractions."""
+    try:
+        val = str(val).strip()
+        if '/' in val:
+            num, den = val.split('/')
+            return float(num) / float(den)
+        return float(val)
+    except (ValueError, TypeError):
+        return None
+
+def parse_fraction_column(series):
+    """
+    Vectorized version of parse_fraction for a whole column. Ints, floats
+    and Clojure fractions are converted with column-wide string and NumPy
+    operations instead of one Python call per cell. Returns the converted
+    float column and the original values of any cells that couldn't be
+    parsed, which become NaN just like parse_fraction's None.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float), series.iloc[0:0]
+
+    text = series.astype(str).str.strip()
+    values = pd.to_numeric(text, errors='coerce')
+
+    # Anything that isn't a plain number may still be a fraction a/b
+    ratio = values.isna() & (text.str.count('/') == 1)
+    if ratio.any():
+        parts = text[ratio].str.split('/', expand=True)
+        num = pd.to_numeric(parts[0], errors='coerce')
+        den = pd.to_numeric(parts[1], errors='coerce')
+        values[ratio] = (num / den.where(den != 0)).to_numpy()
+
+    # Empty cells are read as NaN and aren't errors, everything else that
+    # ended up as NaN is
+    malformed = values.isna() & series.notna() & (text.str.lower() != 'nan')
+    return values.astype(float), series[malformed]
+
+def read_data(filepath):
+    """
+    Reads a size_and_diversity output file, either a CSV or an .npz archive
+    written with --format npz, whose columns are already typed.
+    """
+    if filepath.endswith('.npz'):
+        with np.load(filepath) as data:
+            return pd.DataFrame({col: data[col] for col in data.files})
+    return pd.read_csv(filepath)
+
+def load_stats(filepath, mode='mean', chunk_rows=None):
+    """
+    Loads CSV (or .npz) and returns a dataframe grouped by generation.
+    If chunk_rows is given (see chunk_rows_for), the file is streamed
+    through load_stats_chunked instead of being read whole.
+    """
+    if chunk_rows:
+        return load_stats_chunked(filepath, mode, chunk_rows)
+    try:
+        df = read_data(filepath)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found - {filepath}") from None
+
+    metric_cols = METRIC_COLUMNS
+
+    for col in metric_cols:
+        if col in df.columns:
+            df[col], malformed = parse_fraction_column(df[col])
+            if len(malformed) > 0:
+                examples = ", ".join(repr(val) for val in malformed.unique()[:5])
+                print(f"Warning: {len(malformed)} malformed values in column '{col}' of {filepath} "
+                      f"were treated as missing (e.g. {examples})")
+
+    # Group by generation
+    grouped = df.groupby('generation')[metric_cols]
+
+    if mode == 'mean':
+        return grouped.agg(['mean', 'std'])
+    elif mode == 'median':
+        # Lambda functions for quartiles
+        q25 = lambda x: x.quantile(0.25)
+        q75 = lambda x: x.quantile(0.75)
+        return grouped.agg(['median', q25, q75])
+    else:
+        raise ValueError("Invalid mode. Use 'mean' or 'median'.")
+
+def chunk_rows_for(filepath, chunk_rows=None):
+    """
+    How many rows at a time to aggregate filepath in: chunk_rows if given
+    (0 meaning read it whole), otherwise DEFAULT_CHUNK_ROWS for files over
+    CHUNKED_ABOVE_BYTES and 0 for the rest.
+    """
+    if chunk_rows is not None:
+        return chunk_rows
+    return DEFAULT_CHUNK_ROWS if os.path.getsize(filepath) > CHUNKED_ABOVE_BYTES else 0
+
+def _npy_chunks(zf, name, chunk_rows):
+    """Yields the 1-d array stored as name in an open .npz, chunk_rows values at a time."""
+    with zf.open(name) as f:
+        if np.lib.format.read_magic(f) == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        remaining = shape[0] if shape else 1
+        while remaining > 0:
+            count = min(chunk_rows, remaining)
+            yield np.frombuffer(f.read(count * dtype.itemsize), dtype=dtype, count=count)
+            remaining -= count
+
+def iter_chunks(filepath, chunk_rows, malformed=None):
+    """
+    Yields (generations, {metric: values}) for chunk_rows rows of a
+    size_and_diversity file at a time, as int32 and float32 arrays. Only
+    one chunk is in memory at once: a CSV is read with pandas in chunks,
+    and the columns of an .npz are read straight out of the archive.
+    malformed, if given, collects the malformed values of each column.
+    """
+    if filepath.endswith('.npz'):
+        with zipfile.ZipFile(filepath) as zf:
+            readers = [_npy_chunks(zf, col + '.npy', chunk_rows) for col in ['generation'] + METRIC_COLUMNS]
+            for arrays in zip(*readers):
+                yield (arrays[0].astype(np.int32),
+                       {col: values.astype(np.float32) for col, values in zip(METRIC_COLUMNS, arrays[1:])})
+        return
+
+    for chunk in pd.read_csv(filepath, usecols=['generation'] + METRIC_COLUMNS, chunksize=chunk_rows):
+        metrics = {}
+        for col in METRIC_COLUMNS:
+            values, bad = parse_fraction_column(chunk[col])
+            metrics[col] = values.to_numpy(dtype=np.float32)
+            if malformed is not None and len(bad) > 0:
+                malformed.setdefault(col, []).extend(bad.tolist())
+        yield chunk['generation'].to_numpy(dtype=np.int32), metrics
+
+def _grow(arrays, size):
+    """Pads each per-generation array in arrays with zeros to at least size entries."""
+    for name, array in arrays.items():
+        if len(array) < size:
+            arrays[name] = np.concatenate((array, np.zeros((size - len(array),) + array.shape[1:],
+                                                           dtype=array.dtype)))
+
+def _quantile_bins(values, low, width):
+    """The QUANTILE_BINS histogram bin of each value, given the low end and bin width of its range."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bins = np.where(width > 0, np.floor((values - low) / width), 0)
+    return np.clip(bins, 0, QUANTILE_BINS - 1).astype(np.int64)
+
+def load_stats_chunked(filepath, mode='mean', chunk_rows=DEFAULT_CHUNK_ROWS, stats=None):
+    """
+    load_stats for files too big to read at once. The file is streamed
+    chunk_rows rows at a time, and only per-generation aggregates are kept,
+    so memory depends on the number of generations rather than rows.
+
+    Means and standard deviations come from one pass, merging each chunk's
+    per-generation count, mean and sum of squared deviations into the
+    running ones (Welford's method, in Chan et al.'s parallel form). The
+    median and quartiles are exact: the first pass finds each generation's
+    count and range, and each further pass narrows every quartile down to
+    one bin of a histogram of its range, until it is down to a single value
+    or few enough values to sort (see _chunked_quantiles). However tied or
+    skewed the values are, no more than QUANTILE_CANDIDATES of them are
+    kept for each rank a quartile is read from; skew only costs a pass or
+    two more. If stats is a dict, the number of passes over the file is
+    added to its 'passes', and its 'kept' is raised to the most values the
+    quantile passes held at once.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"File not found - {filepath}")
+    if mode not in ('mean', 'median'):
+        raise ValueError("Invalid mode. Use 'mean' or 'median'.")
+
+    malformed = {}
+    rows = {'rows': np.zeros(0, dtype=np.int64)}
+    count = {col: np.zeros(0) for col in METRIC_COLUMNS}
+    mean = {col: np.zeros(0) for col in METRIC_COLUMNS}
+    m2 = {col: np.zeros(0) for col in METRIC_COLUMNS}
+    low = {col: np.zeros(0) for col in METRIC_COLUMNS}
+    high = {col: np.zeros(0) for col in METRIC_COLUMNS}
+
+    for gens, metrics in iter_chunks(filepath, chunk_rows, malformed):
+        if len(gens) == 0:
+            continue
+        size = int(gens.max()) + 1
+        _grow(rows, size)
+        rows['rows'][:size] += np.bincount(gens, minlength=size)
+        for col, values in metrics.items():
+            for arrays in (count, mean, m2):
+                _grow(arrays, size)
+            values = values.astype(np.float64)
+            valid = ~np.isnan(values)
+            filled = np.where(valid, values, 0.0)
+            n_b = np.bincount(gens, weights=valid, minlength=size)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean_b = np.where(n_b > 0, np.bincount(gens, weights=filled, minlength=size) / n_b, 0.0)
+            m2_b = np.bincount(gens, weights=np.where(valid, (values - mean_b[gens]) ** 2, 0.0),
+                               minlength=size)
+
+            n_a = count[col][:size]
+            n = n_a + n_b
+            delta = mean_b - mean[col][:size]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                share = np.where(n > 0, n_b / n, 0.0)
+            m2[col][:size] += m2_b + delta ** 2 * n_a * share
+            mean[col][:size] += delta * share
+            count[col][:size] = n
+
+            if mode == 'median':
+                for arrays, extreme, fill in ((low, np.fmin, np.inf), (high, np.fmax, -np.inf)):
+                    if len(arrays[col]) < size:
+                        arrays[col] = np.concatenate((arrays[col], np.full(size - len(arrays[col]), fill)))
+                    per_gen = np.full(size, fill)
+                    extreme.at(per_gen, gens[valid], values[valid])
+                    arrays[col][:size] = extreme(arrays[col][:size], per_gen)
+
+    if stats is not None:
+        stats['passes'] = stats.get('passes', 0) + 1
+
+    for col, bad in malformed.items():
+        examples = ", ".join(repr(val) for val in pd.unique(pd.Series(bad))[:5])
+        print(f"Warning: {len(bad)} malformed values in column '{col}' of {filepath} "
+              f"were treated as missing (e.g. {examples})")
+
+    present = np.flatnonzero(rows['rows'])
+    num_gens = len(rows['rows'])
+    for arrays in (count, mean, m2):
+        _grow(arrays, num_gens)
+
+    columns = {}
+    if mode == 'mean':
+        for col in METRIC_COLUMNS:
+            n = count[col]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns[(col, 'mean')] = np.where(n > 0, mean[col], np.nan)[present]
+                columns[(col, 'std')] = np.where(n > 1, np.sqrt(m2[col] / (n - 1)), np.nan)[present]
+    else:
+        for col, (median, q25, q75) in _chunked_quantiles(filepath, chunk_rows, count, low, high,
+                                                           num_gens, stats).items():
+            columns[(col, 'median')] = median[present]
+            columns[(col, '<lambda_0>')] = q25[present]
+            columns[(col, '<lambda_1>')] = q75[present]
+
+    index = pd.Index(present.astype(np.int64), name='generation')
+    return pd.DataFrame(columns, index=index)
+
+def _chunked_quantiles(filepath, chunk_rows, count, low, high, num_gens, stats=None):
+    """
+    The passes after the first of load_stats_chunked's median mode.
+    Returns {metric: (median, 25th percentile, 75th percentile)}, each an
+    array over generations, interpolated the way pandas' quantile does.
+
+    Each quantile lies between the values at two ranks of its generation,
+    and each of those ranks is found by narrowing down a range of values
+    it must lie in, starting from the generation's whole range. Every pass
+    histograms the values in each range into QUANTILE_BINS bins, and the
+    range becomes the lowest to the highest value in the bin the rank falls
+    in. A range that is down to one value gives the rank's value, however
+    many values are tied there, and once a range holds no more than
+    QUANTILE_CANDIDATES values, the next pass keeps them and sorts them.
+    Each pass cuts the spread of a range by about QUANTILE_BINS, so a few
+    passes are enough, and the histograms and kept values never take more
+    than a fixed amount of memory per generation. Ranks whose ranges are
+    the same share one histogram, or one set of kept values.
+    """
+    quantiles = (0.5, 0.25, 0.75)
+    k = len(quantiles)
+    per_gen = 2 * k
+    ranks = {}
+    for col in METRIC_COLUMNS:
+        n = count[col].astype(np.int64)
+        lo = np.full(num_gens, np.inf)
+        hi = np.full(num_gens, -np.inf)
+        lo[:len(low[col])] = low[col]
+        hi[:len(high[col])] = high[col]
+        positions = np.stack([q * np.maximum(n - 1, 0) for q in quantiles], axis=1)
+        lower = np.floor(positions).astype(np.int64)
+        rank = {
+            'rank': np.concatenate((lower, np.minimum(lower + 1, np.maximum(n - 1, 0)[:, None])), axis=1).ravel(),
+            'below': np.zeros(num_gens * per_gen, dtype=np.int64),
+            'inside': np.repeat(n, per_gen),
+            'low': np.repeat(lo, per_gen),
+            'high': np.repeat(hi, per_gen),
+            'value': np.full(num_gens * per_gen, np.nan),
+        }
+        single = (rank['inside'] > 0) & (rank['low'] == rank['high'])
+        rank['value'][single] = rank['low'][single]
+        rank['done'] = single | (rank['inside'] == 0)
+        ranks[col] = (positions - lower, rank)
+
+    passes = most_kept = 0
+    while any(not rank['done'].all() for _, rank in ranks.values()):
+        for _, rank in ranks.values():
+            _share_ranges(rank, num_gens, per_gen)
+
+        kept = 0
+        for gens, metrics in iter_chunks(filepath, chunk_rows):
+            for col, values in metrics.items():
+                rank = ranks[col][1]
+                ranges = rank['ranges']
+                for j in range(ranges['at'].shape[1]):
+                    r = ranges['at'][gens, j]
+                    r_valid = (r >= 0) & ~np.isnan(values)
+                    r, v = r[r_valid], values[r_valid].astype(np.float64)
+                    inside = (v >= ranges['low'][r]) & (v <= ranges['high'][r])
+                    r, v = r[inside], v[inside]
+                    collect = ranges['collect'][r]
+                    ranges['kept'].append((r[collect], v[collect]))
+                    kept += int(collect.sum())
+                    r, v = r[~collect], v[~collect]
+                    cells = r * QUANTILE_BINS + _quantile_bins(v, ranges['low'][r], ranges['width'][r])
+                    ranges['counts'] += np.bincount(cells, minlength=len(ranges['counts']))
+                    np.minimum.at(ranges['lowest'], cells, v)
+                    np.maximum.at(ranges['highest'], cells, v)
+        passes += 1
+        most_kept = max(most_kept, kept)
+
+        for _, rank in ranks.values():
+            _narrow_ranks(rank)
+
+    if stats is not None:
+        stats['passes'] = stats.get('passes', 0) + passes
+        stats['kept'] = max(stats.get('kept', 0), most_kept)
+
+    result = {}
+    for col, (fraction, rank) in ranks.items():
+        value = rank['value'].reshape(num_gens, per_gen)
+        estimates = value[:, :k] + (value[:, k:] - value[:, :k]) * fraction
+        result[col] = tuple(estimates[:, i] for i in range(k))
+    return result
+
+def _share_ranges(rank, num_gens, per_gen):
+    """
+    Sets up one pass of _chunked_quantiles for one column: the distinct
+    ranges of the ranks that aren't done yet, each to be histogrammed or,
+    if it holds no more than QUANTILE_CANDIDATES values, kept whole.
+    rank['ranges']['at'] lists each generation's ranges.
+    """
+    live = np.flatnonzero(~rank['done'])
+    gen = live // per_gen
+    order = np.lexsort((rank['high'][live], rank['low'][live], gen))
+    live, gen = live[order], gen[order]
+    new = np.ones(len(live), dtype=bool)
+    new[1:] = (gen[1:] != gen[:-1]) | (rank['low'][live[1:]] != rank['low'][live[:-1]]) | \
+        (rank['high'][live[1:]] != rank['high'][live[:-1]])
+    owner = np.cumsum(new) - 1
+    first = live[new]
+
+    # Each range's place among its generation's ranges
+    range_gen = first // per_gen
+    gen_start = np.searchsorted(range_gen, range_gen)
+    at = np.full((num_gens, max(int((np.arange(len(first)) - gen_start).max(initial=-1)) + 1, 1)), -1)
+    at[range_gen, np.arange(len(first)) - gen_start] = np.arange(len(first))
+
+    num_ranges = len(first)
+    rank['owner'] = np.full(len(rank['done']), -1)
+    rank['owner'][live] = owner
+    rank['ranges'] = {
+        'at': at,
+        'low': rank['low'][first],
+        'high': rank['high'][first],
+        'width': (rank['high'][first] - rank['low'][first]) / QUANTILE_BINS,
+        'collect': rank['inside'][first] <= QUANTILE_CANDIDATES,
+        'counts': np.zeros(num_ranges * QUANTILE_BINS, dtype=np.int64),
+        'lowest': np.full(num_ranges * QUANTILE_BINS, np.inf),
+        'highest': np.full(num_ranges * QUANTILE_BINS, -np.inf),
+        'kept': [],
+    }
+
+def _narrow_ranks(rank):
+    """
+    Finishes one pass of _chunked_quantiles for one column: ranks in a kept
+    range are picked out of its sorted values, and the others move to the
+    bin of their range's histogram they fall in.
+    """
+    ranges = rank['ranges']
+    live = np.flatnonzero(rank['owner'] >= 0)
+    owner = rank['owner'][live]
+    local = rank['rank'][live] - rank['below'][live]
+
+    collected = ranges['collect'][owner]
+    if collected.any():
+        owners = np.concatenate([r for r, _ in ranges['kept']])
+        values = np.concatenate([v for _, v in ranges['kept']])
+        order = np.lexsort((values, owners))
+        owners, values = owners[order], values[order]
+        picked = live[collected]
+        at = np.searchsorted(owners, owner[collected]) + local[collected]
+        rank['value'][picked] = values[at]
+        rank['done'][picked] = True
+
+    refined = live[~collected]
+    if len(refined):
+        owner, local = owner[~collected], local[~collected]
+        counts = ranges['counts'].reshape(-1, QUANTILE_BINS)[owner]
+        cumulative = counts.cumsum(axis=1)
+        bins = np.minimum((cumulative <= local[:, None]).sum(axis=1), QUANTILE_BINS - 1)
+        rows = np.arange(len(refined))
+        cells = owner * QUANTILE_BINS + bins
+        rank['below'][refined] += np.where(bins > 0, cumulative[rows, np.maximum(bins - 1, 0)], 0)
+        rank['inside'][refined] = counts[rows, bins]
+        rank['low'][refined] = ranges['lowest'][cells]
+        rank['high'][refined] = ranges['highest'][cells]
+        single = rank['low'][refined] == rank['high'][refined]
+        rank['value'][refined[single]] = rank['low'][refined[single]]
+        rank['done'][refined[single]] = True
+
+def _buckets(values, buckets):
+    """values, padded with NaN and cut into buckets rows of consecutive points."""
+    size = -(-len(values) // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:len(values)] = values
+    return padded.reshape(buckets, size)
+
+def lod_indices(values, buckets):
+    """
+    The indices of the points of a line to keep when drawing it buckets
+    columns wide: the first and last, and the lowest and highest point of
+    each bucket of consecutive points, in order. Through them the line
+    looks the same at that resolution, peaks and dips included. Lines
+    with no more than two points per bucket are kept whole.
+    """
+    n = len(values)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    rows = _buckets(values, buckets)
+    starts = np.arange(buckets) * rows.shape[1]
+    lowest = starts + np.where(np.isnan(rows), np.inf, rows).argmin(axis=1)
+    highest = starts + np.where(np.isnan(rows), -np.inf, rows).argmax(axis=1)
+    keep = np.concatenate(([0, n - 1], lowest, highest))
+    return np.unique(keep[keep < n])
+
+def band_envelope(x, lower, upper, buckets):
+    """
+    Decimates an error band to buckets buckets of consecutive points, each
+    drawn from its first to its last x between the lowest lower and the
+    highest upper bound in it, so the band never looks narrower than it is.
+    """
+    n = len(x)
+    if n <= 2 * buckets:
+        return x, lower, upper
+    lows = _buckets(lower, buckets)
+    highs = _buckets(upper, buckets)
+    size = lows.shape[1]
+    starts = np.arange(buckets) * size
+    used = starts < n
+    with warnings.catch_warnings():
+        # Buckets where a bound is missing throughout leave a gap in the band
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low = np.nanmin(lows, axis=1)[used]
+        high = np.nanmax(highs, axis=1)[used]
+    edges = np.column_stack((x[starts[used]], x[np.minimum(starts[used] + size - 1, n - 1)])).ravel()
+    return edges, np.repeat(low, 2), np.repeat(high, 2)
+
+def plot_single_series(ax, df, col_name, mode, scale_factor, style, lod_buckets=None, rasterize_band=False):
+    """
+    Helper function to plot a single line + error band on ax. With lod_buckets,
+    series longer than that are decimated with lod_indices and
+    band_envelope. rasterize_band draws the band as an image in the PDF.
+    """
+    if col_name not in df:
+        return
+
+    generations = df.index
+    
+    # Calculate Center, Lower, and Upper bounds based on mode
+    if mode == 'mean':
+        center = df[col_name]['mean'] / scale_factor
+        std_dev = df[col_name]['std'] / scale_factor
+        lower = center - std_dev
+        upper = center + std_dev
+    else: # median
+        center = df[col_name]['median'] / scale_factor
+        # The quartiles are stored in columns with lambda names by pandas aggregation
+        lower = df[col_name]['<lambda_0>'] / scale_factor
+        upper = df[col_name]['<lambda_1>'] / scale_factor
+
+    line_x, line_y = generations, center
+    band_x, band_lower, band_upper = generations, lower, upper
+    if lod_buckets:
+        generations = np.asarray(generations)
+        keep = lod_indices(np.asarray(center, dtype=float), lod_buckets)
+        line_x, line_y = generations[keep], np.asarray(center)[keep]
+        band_x, band_lower, band_upper = band_envelope(generations, np.asarray(lower, dtype=float),
+                                                       np.asarray(upper, dtype=float), lod_buckets)
+
+    # Plot Line
+    ax.plot(line_x, line_y,
+            color=style['color'], 
+            linestyle=style['linestyle'], 
+            label=style['label'])
+    
+    # Plot Band
+    ax.fill_between(band_x, band_lower, band_upper,
+                    color=style['color'], 
+                    alpha=style['fill_alpha'], 
+                    linewidth=style['linewidth'],
+                    rasterized=rasterize_band)
+
+METRICS = [
+    ('codeSizeMean', 'Mean Code Size', 'mean_code_size'),
+    ('codeSizeMedian', 'Median Code Size', 'median_code_size'),
+    ('genomeSizeMean', 'Mean Genome Size', 'mean_genome_size'),
+    ('genomeSizeMedian', 'Median Genome Size', 'median_genome_size'),
+    ('uniqueBehaviors', 'Diversity (Unique Behaviors / 1000)', 'diversity')
+]
+
+# The first two series keep the original black and blue; the rest take the
+# Okabe-Ito colorblind-safe colors, then repeat them with other line styles
+SERIES_COLORS = ['black', '#00AAFF', '#E69F00', '#009E73', '#D55E00',
+                 '#CC79A7', '#0072B2', '#F0E442']
+SERIES_LINESTYLES = ['-', '--', '-.', ':']
+
+def series_styles(labels):
+    """One style dict per series, distinct for any number of series."""
+    # Overlapping bands get muddy, so they fade as more series are added
+    fill_alpha = 0.2 if len(labels) <= 3 else 0.1
+    styles = []
+    for i, label in enumerate(labels):
+        styles.append({
+            'color': SERIES_COLORS[i % len(SERIES_COLORS)],
+            'linestyle': SERIES_LINESTYLES[(i // len(SERIES_COLORS)) % len(SERIES_LINESTYLES)],
+            'label': label,
+            'fill_alpha': fill_alpha,
+            'linewidth': 1
+        })
+    return styles
+
+def render_figure(stats, styles, col_name, title, mode, output_filename, lod=True, rasterize_bands=False):
+    """
+    Draws one metric for every series and saves it to output_filename.
+    Unless lod is False, series longer than LOD_BUCKETS generations are
+    decimated to about the output resolution, so the PDF stays small
+    however long the runs were. rasterize_bands draws the error bands as
+    images, keeping the lines, axes and text vector.
+    """
+    with matplotlib.rc_context(PUBLICATION_STYLE):
+        fig = Figure(figsize=FIGURE_SIZE)
+        ax = fig.add_subplot()
+
+        # Determine scaling
+        scale_factor = 1000.0 if col_name == 'uniqueBehaviors' else 1.0
+
+        for df, style in zip(stats, styles):
+            plot_single_series(ax, df, col_name, mode, scale_factor, style,
+                               LOD_BUCKETS if lod else None, rasterize_bands)
+
+        # Styling
+        ax.set_xlabel("Generation")
+        ax.set_ylabel(title)
+
+        if col_name == 'uniqueBehaviors':
+            ax.set_ylim(0, 1)
+
+        finish_figure(fig, ax, len(styles), output_filename)
+    return os.path.abspath(output_filename)
+
+def finish_figure(fig, ax, num_series, output_filename):
+    """Adds the grid and legend every figure has, and saves fig as a PDF."""
+    ax.grid(True, linestyle=':', color='gray', alpha=0.5)
+    ax.legend(frameon=True, framealpha=1, edgecolor='black',
+              ncol=1 if num_series <= 6 else 2)
+    fig.tight_layout()
+    fig.savefig(output_filename, format='pdf', dpi=SAVE_DPI)
+
+def load_stats_cached(filepath, mode, key, cache_dir, chunk_rows=0):
+    """load_stats, going through the aggregate cache in cache_dir unless it is None."""
+    if cache_dir is not None:
+        stats = aggregate_cache.load(cache_dir, key)
+        if stats is not None:
+            return stats
+    stats = load_stats(filepath, mode, chunk_rows)
+    if cache_dir is not None:
+        aggregate_cache.store(cache_dir, key, stats)
+    return stats
+
+def figure_fingerprint(digests, styles, col_name, title, mode, detail):
+    """A hash of everything a figure's PDF depends on."""
+    inputs = [FIGURE_VERSION, matplotlib.__version__, PUBLICATION_STYLE,
+              digests, styles, col_name, title, mode, detail]
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+def render_figures(figures, mode, jobs=1, cache_dir=None, max_cache_mb=aggregate_cache.DEFAULT_MAX_MB,
+                   force=False, chunk_rows=None, lod=True, rasterize_bands=False):
+    """
+    Loads every file the figures need and renders them all, both spread
+    over jobs processes. figures is a list of (files, labels, prefix) and
+    each one gives a PDF per metric in images/. A PDF whose data files and
+    style are the same as when it was last drawn is left alone unless
+    force is set. If cache_dir is given, the per-generation aggregates are
+    kept there between runs. chunk_rows is passed to chunk_rows_for, and
+    lod and rasterize_bands to render_figure.
+    """
+    files = sorted({path for paths, _, _ in figures for path in paths})
+    missing = [path for path in files if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"File not found - {missing[0]}")
+
+    digests = dict(zip(files, parallel.pool_map(aggregate_cache.file_digest,
+                                                [(path,) for path in files], jobs)))
+
+    # Ensure output directory exists
+    if not os.path.exists('images'):
+        os.makedirs('images')
+    stamps = scan_cache.load_cache('images', STAMPS_NAME)
+
+    plans = []
+    for paths, labels, prefix in figures:
+        styles = series_styles(labels)
+        for col_name, title, suffix in METRICS:
+            output_filename = f"images/{prefix}_{suffix}.pdf"
+            fingerprint = figure_fingerprint([digests[path] for path in paths], styles,
+                                             col_name, title, mode,
+                                             {'lod': lod, 'rasterize_bands': rasterize_bands})
+            if not force and stamps.get(output_filename) == fingerprint and \
+                    os.path.exists(output_filename):
+                print(f"Up to date: {os.path.abspath(output_filename)}")
+                continue
+            plans.append((paths, styles, col_name, title, output_filename, fingerprint))
+
+    # Each file is read once even if several figure sets use it, and only
+    # if some figure that uses it has to be drawn again
+    needed = sorted({path for plan in plans for path in plan[0]})
+    chunks = {path: chunk_rows_for(path, chunk_rows) for path in needed}
+    # Chunked aggregates are computed from float32 values, so they are
+    # cached apart from the ones computed from the whole file
+    keys = {path: hashlib.sha256(f"{digests[path]}:{mode}:{pd.__version__}:{bool(chunks[path])}"
+                                 .encode('utf-8')).hexdigest()
+            for path in needed}
+    stats = dict(zip(needed, parallel.pool_map(load_stats_cached,
+                                               [(path, mode, keys[path], cache_dir, chunks[path])
+                                                for path in needed],
+                                               jobs)))
+    if cache_dir is not None:
+        aggregate_cache.evict(cache_dir, max_cache_mb * 1024 * 1024)
+
+    tasks = [([stats[path] for path in paths], styles, col_name, title, mode, output_filename,
+              lod, rasterize_bands)
+             for paths, styles, col_name, title, output_filename, _ in plans]
+    for plan, saved in zip(plans, parallel.pool_imap(render_figure, tasks, jobs)):
+        stamps[plan[4]] = plan[5]
+        print(f"Saved: {saved}")
+
+    scan_cache.save_cache('images', STAMPS_NAME, stamps)
+
+def plot_and_save(files, labels, prefix, mode, jobs=1, **render_options):
+    """
+    Plots every metric for the files against each other, one series per
+    file. render_options are passed on to render_figures.
+    """
+    render_figures([(files, labels, prefix)], mode, jobs, **render_options)
+
+def read_manifest(manifest_path):
+    """
+    Reads a batch manifest: a CSV with the columns problem, config and file
+    (relative paths are relative to the manifest). Returns a list of
+    (problem, [(config, file), ...]) in the order the problems first
+    appear, with each problem's configs in manifest order.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    problems = {}
+    with open(manifest_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {'problem', 'config', 'file'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"manifest {manifest_path} has no {', '.join(sorted(missing))} column")
+        for row in reader:
+            path = os.path.join(base, row['file'].strip())
+            problems.setdefault(row['problem'].strip(), []).append((row['config'].strip(), path))
+    return list(problems.items())
+
+def plot_manifest(manifest_path, prefix, mode, jobs=1, **render_options):
+    """Plots every problem in a manifest, comparing its configs, as <prefix>_<problem>_<metric>.pdf."""
+    figures = []
+    for problem, series in read_manifest(manifest_path):
+        figures.append(([path for _, path in series], [config for config, _ in series],
+                        f"{prefix}_{problem}"))
+    render_figures(figures, mode, jobs, **render_options)
+
+SUCCESS_CURVES = [
+    ('successRate', 'Fraction of Runs Solved', 'success'),
+    ('survival', 'Runs Without a Solution (Kaplan-Meier)', 'survival')
+]
+
+def success_series(tables, labels):
+    """
+    The series plot_success draws: one (table rows, label) per file and
+    configuration in it. A configuration is labeled with its file's label,
+    unless there is only one file, or the file holds several
+    configurations, when the configuration's name is used (after the
+    file's label if there are several files).
+    """
+    series = []
+    for table, label in zip(tables, labels):
+        configs = list(dict.fromkeys(table['config']))
+        for config in configs:
+            if len(tables) == 1:
+                name = config
+            elif len(configs) == 1:
+                name = label
+            else:
+                name = f"{label} {config}"
+            series.append((table[table['config'] == config], name))
+    return series
+
+def plot_success(files, labels, prefix):
+    """
+    Plots the curves written by the success command as
+    images/<prefix>_<problem>_<curve>.pdf, one figure per problem and curve
+    in SUCCESS_CURVES, with one series per file and configuration that has
+    the problem (see success_series). The files are a few rows per
+    generation, so they are simply read whole.
+    """
+    for path in files:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File not found - {path}")
+    tables = [pd.read_csv(path, dtype={'config': str, 'problem': str}) for path in files]
+    for path, table in zip(files, tables):
+        if 'config' not in table or 'problem' not in table:
+            raise ValueError(f"{path} wasn't written by the success command")
+    series = success_series(tables, labels)
+    styles = series_styles([name for _, name in series])
+
+    if not os.path.exists('images'):
+        os.makedirs('images')
+
+    problems = sorted(set().union(*(table['problem'] for table in tables)))
+    for problem in problems:
+        for col_name, title, suffix in SUCCESS_CURVES:
+            with matplotlib.rc_context(PUBLICATION_STYLE):
+                fig = Figure(figsize=FIGURE_SIZE)
+                ax = fig.add_subplot()
+                for (table, _), style in zip(series, styles):
+                    rows = table[table['problem'] == problem]
+                    if len(rows) == 0:
+                        continue
+                    # Both curves only change at the generations runs end in
+                    ax.step(rows['generation'], rows[col_name], where='post',
+                            color=style['color'], linestyle=style['linestyle'], label=style['label'])
+
+                ax.set_xlabel("Generation")
+                ax.set_ylabel(title)
+                ax.set_ylim(0, 1.02)
+                output_filename = f"images/{prefix}_{problem}_{suffix}.pdf"
+                finish_figure(fig, ax, len(styles), output_filename)
+            print(f"Saved: {os.path.abspath(output_filename)}")
+
+def main(argv=None):
+    # The arguments are defined next to the other subcommands in cli, which
+    # can build its parser without importing this module, and which turns
+    # errors into an exit status
+    from . import cli
+
+    cli.main(["plot"] + list(sys.argv[1:] if argv is None else argv))
+
+def run(args):
+    jobs = parallel.resolve_jobs(args.jobs)
+    render_options = {
+        'cache_dir': None if args.no_cache else (args.cache_dir or aggregate_cache.default_cache_dir()),
+        'max_cache_mb': args.cache_size,
+        'force': args.force,
+        'chunk_rows': args.chunk_rows,
+        'lod': not args.no_lod,
+        'rasterize_bands': args.rasterize_bands,
+    }
+    if args.manifest:
+        if args.success:
+            raise ValueError("--success takes the files written by the success command, not --manifest")
+        if args.files:
+            raise ValueError("give either data files or --manifest, not both")
+        plot_manifest(args.manifest, args.prefix, args.stats, jobs, **render_options)
+        return
+
+    if not args.files:
+        raise ValueError("no data files to plot (or use --manifest)")
+
+    labels = list(args.labels or [])
+    if len(labels) > len(args.files):
+        raise ValueError("more --labels than data files")
+    labels += [f"Setting {i + 1}" for i in range(len(labels), len(args.files))]
+    # --label1 and --label2 are the older way to name the first two files
+    for i, old_label in enumerate([args.label1, args.label2]):
+        if old_label is not None and i < len(args.files):
+            labels[i] = old_label
+
+    if args.success:
+        plot_success(args.files, labels, args.prefix)
+        return
+    plot_and_save(args.files, labels, args.prefix, args.stats, jobs, **render_options)
+
+if __name__ == "__main__":
+    main()
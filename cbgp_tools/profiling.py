@@ -0,0 +1,139 @@
+"""
+Optional timing and throughput numbers for the scrapers (--profile).
+
+A Profile collects the wall time of each phase of a scrape (listing the
+directory, stat calls, cache I/O, reading and parsing, output), plus, for
+every file read, its latency, the bytes it read, the lines it examined and
+how many of those had a marker (regex hits). Worker processes measure
+their own files with profiled_call and send the numbers back with the
+result. Without
+--profile none of this runs: the scrapers get profile=None, and the
+parsers get stats=None and skip their counting.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+from . import parallel
+
+
+def new_file_stats():
+    return {'bytes': 0, 'lines': 0, 'hits': 0}
+
+
+def profiled_call(func, *args):
+    """
+    Runs func(*args, stats=...) and returns (its result, its file stats,
+    with 'seconds' added). A top-level function, so it can be sent to
+    worker processes.
+    """
+    stats = new_file_stats()
+    start = time.perf_counter()
+    result = func(*args, stats=stats)
+    stats['seconds'] = time.perf_counter() - start
+    return result, stats
+
+
+def phase(profile, name):
+    """profile.phase(name), or a context that does nothing if profile is None."""
+    return nullcontext() if profile is None else profile.phase(name)
+
+
+def profiled_imap(func, args_list, jobs=1, profile=None, max_pending=None):
+    """
+    parallel.pool_imap(func, args_list, ...), except that with a profile,
+    each call is timed and counted in its worker and the time spent waiting
+    for results goes to the 'read+parse' phase. func must take a stats
+    keyword argument.
+    """
+    if profile is None:
+        yield from parallel.pool_imap(func, args_list, jobs, max_pending)
+        return
+
+    results = parallel.pool_imap(profiled_call, [(func,) + tuple(args) for args in args_list],
+                                 jobs, max_pending)
+    while True:
+        with profile.phase('read+parse'):
+            item = next(results, None)
+        if item is None:
+            return
+        result, stats = item
+        profile.add_file(stats)
+        yield result
+
+
+def percentile(sorted_values, q):
+    """The q-th quantile of an already sorted list, interpolated like numpy's default."""
+    if not sorted_values:
+        return 0.0
+    position = q * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class Profile:
+
+    def __init__(self, command):
+        self.command = command
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.totals = new_file_stats()
+        self.file_seconds = []
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the wall time of the with block to the named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add_file(self, stats):
+        for key in self.totals:
+            self.totals[key] += stats[key]
+        self.file_seconds.append(stats['seconds'])
+
+    def to_dict(self):
+        latencies = sorted(self.file_seconds)
+        total = time.perf_counter() - self.started
+        parse_seconds = self.phases.get('read+parse', 0.0)
+        return {
+            'command': self.command,
+            'total_seconds': total,
+            'phases': dict(self.phases),
+            'files': len(latencies),
+            'bytes': self.totals['bytes'],
+            'lines': self.totals['lines'],
+            'hits': self.totals['hits'],
+            'mb_per_s': self.totals['bytes'] / 1e6 / parse_seconds if parse_seconds else None,
+            'file_latency_seconds': {
+                'p50': percentile(latencies, 0.50),
+                'p90': percentile(latencies, 0.90),
+                'p99': percentile(latencies, 0.99),
+                'max': latencies[-1] if latencies else 0.0,
+            },
+        }
+
+    def print_report(self, out=sys.stderr):
+        """Prints a summary table, to stderr so that CSV output stays clean."""
+        report = self.to_dict()
+        out.write(f"------------------------------ profile: {self.command}\n")
+        for name, seconds in report['phases'].items():
+            share = 100 * seconds / report['total_seconds'] if report['total_seconds'] else 0
+            out.write(f"{name:<20} {seconds:9.4f} s  {share:5.1f}%\n")
+        out.write(f"{'total':<20} {report['total_seconds']:9.4f} s\n")
+        out.write(f"files read: {report['files']}   bytes: {report['bytes']}   "
+                  f"lines: {report['lines']}   hits: {report['hits']}\n")
+        if report['mb_per_s'] is not None:
+            out.write(f"read+parse throughput: {report['mb_per_s']:.1f} MB/s\n")
+        latency = report['file_latency_seconds']
+        out.write("per-file latency (ms): p50 %.2f  p90 %.2f  p99 %.2f  max %.2f\n"
+                  % tuple(1000 * latency[key] for key in ('p50', 'p90', 'p99', 'max')))
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,69 @@
+"""
+Finding the runN.txt and runN_types.edn files of a results directory.
+
+find_runs lists the directory once with os.scandir and maps every run
+number to its directory entry, so runs after a missing one are still
+found, and find_gaps says which ones are missing. stat_entries then gets
+the stat results of all the entries from a pool of threads: on a local
+disk a stat is cheap, but on NFS each one is a round trip to the server,
+and issuing them together costs about as long as one round trip per
+STAT_THREADS files instead of one per file.
+"""
+
+import os
+import re
+
+from .compression import COMPRESSED_SUFFIXES
+
+STAT_THREADS = 16
+
+
+def run_file_pattern(prefix, suffix):
+    """Matches prefix + N + suffix, and the compressed versions of it, capturing N."""
+    compressed = '|'.join(re.escape(s) for s in COMPRESSED_SUFFIXES)
+    return re.compile(rf'{re.escape(prefix)}(0|[1-9]\d*){re.escape(suffix)}({compressed})?$')
+
+
+def _preference(match):
+    """Sorts the uncompressed file first, then the compressed ones in COMPRESSED_SUFFIXES order."""
+    return 0 if match.group(2) is None else 1 + COMPRESSED_SUFFIXES.index(match.group(2))
+
+
+def find_runs(directory, prefix="run", suffix=".txt"):
+    """
+    Returns {run number: os.DirEntry} for the files named prefix + N +
+    suffix in directory, in one pass over it. If a run has both a plain and
+    a compressed file, the plain one is used.
+    """
+    pattern = run_file_pattern(prefix, suffix)
+    runs = {}
+    preferences = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            match = pattern.match(entry.name)
+            if match is None or not entry.is_file():
+                continue
+            run = int(match.group(1))
+            if run not in runs or _preference(match) < preferences[run]:
+                runs[run] = entry
+                preferences[run] = _preference(match)
+    return runs
+
+
+def find_gaps(runs):
+    """The run numbers below the highest one in runs that have no file."""
+    if not runs:
+        return []
+    return [run for run in range(max(runs)) if run not in runs]
+
+
+def stat_entries(entries, threads=STAT_THREADS):
+    """[entry.stat() for entry in entries], with the calls spread over threads threads."""
+    entries = list(entries)
+    if threads <= 1 or len(entries) < 2:
+        return [entry.stat() for entry in entries]
+    # Imported here, as it takes longer to import than status takes to run
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(min(threads, len(entries))) as pool:
+        return list(pool.map(lambda entry: entry.stat(), entries))
@@ -0,0 +1,351 @@
+"""
+Shared reader for the files a single GP run leaves behind.
+
+Every scraper works from the same per-run record, a dict with these keys:
+
+    'run'          run number, as the string found in the file name
+    'generation'   last generation started, as a string (None if none yet)
+    'solution'     True/False once the run has finished, None while running
+    'generalized'  True if the solution also had zero error on the test set
+    'rows'         one dict per generation with its size and diversity stats
+    'types'        array of type frequencies from runN_types.edn, or None
+    'type_names'   the types those frequencies belong to, as EDN text
+    'offset'       byte offset of the last STARTING line in the log
+    'starts'       [generation, byte offset] of every STARTING line parsed
+
+parse_log fills in everything that comes from runN.txt in a single pass
+over the file. scan_status only reads the end of the log and fills in the
+run status, which is all a status check needs. read_types reads the
+matching runN_types.edn file. Any of these files may be compressed (see
+compression.py).
+"""
+
+import mmap
+import os
+import re
+
+from . import edn_types
+from .compression import is_compressed, open_log
+
+generation_start_pattern = re.compile(r'STARTING\s+(\d+)')
+
+# Line identifiers
+code_size_line_check = re.compile(r':code-size\s+\{')
+genome_size_line_check = re.compile(r':genome-size\s+\{')
+unique_behaviors_pattern = re.compile(r':unique-behaviors\s+(\d+)')
+
+# Reusable patterns for extracting values within a map line
+mean_pattern = re.compile(r':mean\s+([^,\}\s]+)')
+median_pattern = re.compile(r':50%\s+([^,\}\s]+)')
+
+ROW_FIELDS = [
+    'runNumber', 'generation',
+    'codeSizeMean', 'codeSizeMedian',
+    'genomeSizeMean', 'genomeSizeMedian',
+    'uniqueBehaviors'
+]
+
+
+def to_float(value):
+    """
+    Converts a value scraped from a log, which may be an int, a float or a
+    Clojure ratio like 1234/5, to a float. Missing values become NaN.
+    """
+    if value == '':
+        return float('nan')
+    if '/' in value:
+        num, den = value.split('/')
+        return float(num) / float(den)
+    return float(value)
+
+
+def new_record(run_number):
+    return {
+        'run': run_number,
+        'generation': None,
+        'solution': None,
+        'generalized': False,
+        'rows': [],
+        'types': None,
+        'type_names': None,
+        'offset': 0,
+        'starts': []
+    }
+
+
+def check_solution_line(line, record):
+    """Updates the run status in record if line is one of the SOLUTION markers."""
+    if "SOLUTION GENERALIZED" in line:
+        record['solution'] = True
+        record['generalized'] = True
+
+    if "SOLUTION FAILED TO GENERALIZE" in line:
+        record['solution'] = True
+
+    if "SOLUTION NOT FOUND" in line:
+        record['solution'] = False
+
+
+def parse_log(file_path, record, offset=0, stats=None, stop=None):
+    """
+    Reads a run log once, from byte offset (which must be the start of a
+    line) to the end, and adds what it finds to record: one row per
+    generation, the last generation started, and the run status. Afterwards
+    record['offset'] is the byte offset of the last STARTING line, i.e.
+    where parsing has to pick up again if the file keeps growing, and
+    record['starts'] has the offset of every generation that was parsed.
+    If stop is given (the offset of a later line), parsing ends there.
+
+    Only lines that contain one of LINE_MARKERS can change the record, so
+    uncompressed logs are memory-mapped and searched for those markers
+    directly (see _scan_lines), skipping every other line without
+    splitting it out or decoding it.
+
+    If stats is a dict (see profiling.py), the bytes read from disk and the
+    lines examined are added to it.
+    """
+    rows = record['rows']
+    current_row = {}
+    record['offset'] = offset
+
+    if is_compressed(file_path):
+        lines = _read_lines(file_path, offset, stop)
+    else:
+        lines = _scan_lines(file_path, offset, stop)
+
+    if stats is not None:
+        # A compressed log is always decompressed from its start
+        size = os.path.getsize(file_path)
+        if is_compressed(file_path):
+            stats['bytes'] += size
+        else:
+            stats['bytes'] += max(0, (size if stop is None else min(stop, size)) - offset)
+        lines = _counted(lines, stats)
+
+    for line_offset, raw_line in lines:
+        line = raw_line.decode('utf-8')
+
+        # --- Check for New Generation ---
+        gen_match = generation_start_pattern.search(line)
+        if gen_match:
+            # Save previous row if it exists
+            if current_row:
+                rows.append(current_row)
+
+            # Initialize new row
+            current_row = {
+                'runNumber': record['run'],
+                'generation': gen_match.group(1),
+                'codeSizeMean': '',
+                'codeSizeMedian': '',
+                'genomeSizeMean': '',
+                'genomeSizeMedian': '',
+                'uniqueBehaviors': ''
+            }
+            record['generation'] = gen_match.group(1)
+            record['offset'] = line_offset
+            record['starts'].append([int(gen_match.group(1)), line_offset])
+            # Only SOLUTION lines after the last generation count
+            record['solution'] = None
+            record['generalized'] = False
+            continue
+
+        if not current_row:
+            continue
+
+        # --- Check for Code Size Statistics ---
+        if code_size_line_check.search(line):
+            mean_match = mean_pattern.search(line)
+            if mean_match:
+                current_row['codeSizeMean'] = mean_match.group(1)
+
+            median_match = median_pattern.search(line)
+            if median_match:
+                current_row['codeSizeMedian'] = median_match.group(1)
+
+        # --- Check for Genome Size Statistics ---
+        elif genome_size_line_check.search(line):
+            mean_match = mean_pattern.search(line)
+            if mean_match:
+                current_row['genomeSizeMean'] = mean_match.group(1)
+
+            median_match = median_pattern.search(line)
+            if median_match:
+                current_row['genomeSizeMedian'] = median_match.group(1)
+
+        # --- Check for Unique Behaviors ---
+        elif (beh_match := unique_behaviors_pattern.search(line)):
+            current_row['uniqueBehaviors'] = beh_match.group(1)
+
+        else:
+            check_solution_line(line, record)
+
+    # End of file: Append the very last generation row
+    if current_row:
+        rows.append(current_row)
+
+    return record
+
+
+# Every line parse_log acts on contains one of these: STARTING, the three
+# statistics keys, or one of the SOLUTION markers in check_solution_line
+LINE_MARKERS = (b'STARTING', b':code-size', b':genome-size', b':unique-behaviors', b'SOLUTION')
+
+def _counted(lines, stats):
+    """Passes lines through, counting them and the ones with a marker in stats."""
+    for line_offset, raw_line in lines:
+        stats['lines'] += 1
+        if any(marker in raw_line for marker in LINE_MARKERS):
+            stats['hits'] += 1
+        yield line_offset, raw_line
+
+def _read_lines(file_path, offset, stop=None):
+    """Yields (byte offset, line) for every line of a (compressed) log from offset up to stop."""
+    with open_log(file_path) as f:
+        if offset:
+            f.seek(offset)
+        position = offset
+        for raw_line in f:
+            if stop is not None and position >= stop:
+                return
+            yield position, raw_line
+            position += len(raw_line)
+
+def _scan_lines(file_path, offset, stop=None):
+    """
+    Yields (byte offset, line) for the lines of a log from offset up to
+    stop that contain one of LINE_MARKERS. The file is memory-mapped and
+    the search jumps straight from one marker to the next, so the lines in
+    between are never split out or decoded, and nothing past stop is read.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            find = buf.find
+            size = len(buf) if stop is None else min(stop, len(buf))
+            # The next position of each marker, or size once there are no more
+            upcoming = [find(marker, offset, size) for marker in LINE_MARKERS]
+            upcoming = [size if pos < 0 else pos for pos in upcoming]
+            markers = list(enumerate(LINE_MARKERS))
+            while True:
+                hit = min(upcoming)
+                if hit >= size:
+                    return
+                start = buf.rfind(b"\n", offset, hit) + 1 or offset
+                end = find(b"\n", hit) + 1 or len(buf)
+                yield start, buf[start:end]
+                # Any other markers on the same line were handled with it
+                for i, marker in markers:
+                    if upcoming[i] < end:
+                        pos = find(marker, end, size)
+                        upcoming[i] = size if pos < 0 else pos
+
+def reverse_readline(filename, block_size=8192, use_mmap=False):
+    """Yields the lines of filename from last to first.
+
+    Reads backwards from the end of the file one block at a time, so finding
+    the last STARTING line only touches the tail of the log instead of the
+    whole file. With use_mmap=True the file is memory-mapped and searched
+    for newlines in place instead."""
+    if use_mmap:
+        yield from _reverse_readline_mmap(filename)
+        return
+
+    with open(filename, 'rb') as fheader:
+        position = fheader.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            fheader.seek(position)
+            lines = (fheader.read(read_size) + remainder).split(b"\n")
+            # The first piece may be the end of a line that started in an
+            # earlier block, so hold on to it until that block is read
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                if line:
+                    yield line.decode('utf-8', errors='replace')
+        if remainder:
+            yield remainder.decode('utf-8', errors='replace')
+
+def _reverse_readline_mmap(filename):
+    with open(filename, 'rb') as fheader:
+        with mmap.mmap(fheader.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield from _reverse_lines(buf)
+
+def _reverse_lines(buf):
+    """Yields the lines of a bytes-like buffer from last to first."""
+    end = len(buf)
+    while end > 0:
+        start = buf.rfind(b"\n", 0, end) + 1
+        if start < end:
+            yield buf[start:end].decode('utf-8', errors='replace')
+        end = start - 1
+
+
+def read_last_generation(file_path, block_size=1 << 20):
+    """
+    Returns the bytes of a (compressed) log from the start of its last
+    STARTING line to the end, or the whole log if it has none. A compressed
+    stream can't be read backwards, so the log is decompressed from the
+    start, but only the current generation's output is ever kept in memory.
+    """
+    tail = b""
+    with open_log(file_path) as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            tail += block
+            start = tail.rfind(b"STARTING")
+            if start > 0:
+                tail = tail[tail.rfind(b"\n", 0, start) + 1:]
+    return tail
+
+
+def scan_status(file_path, record, use_mmap=False, stats=None):
+    """
+    Fills in the last generation started and the run status of record by
+    reading the log backwards until its last STARTING line. If stats is a
+    dict, the bytes and lines examined are added to it.
+    """
+    if is_compressed(file_path):
+        lines = _reverse_lines(read_last_generation(file_path))
+        if stats is not None:
+            stats['bytes'] += os.path.getsize(file_path)
+    else:
+        lines = reverse_readline(file_path, use_mmap=use_mmap)
+
+    for line in lines:
+        if stats is not None:
+            stats['lines'] += 1
+            if not is_compressed(file_path):
+                stats['bytes'] += len(line.encode('utf-8')) + 1
+            if "STARTING" in line or "SOLUTION" in line:
+                stats['hits'] += 1
+
+        check_solution_line(line, record)
+
+        if "STARTING" in line:
+            record['generation'] = line.split("STARTING", 1)[1].strip()
+            break
+
+    return record
+
+
+def read_types(file_path, record, stats=None):
+    """
+    Sets record['types'] to the array of type frequencies in a
+    runN_types.edn file and record['type_names'] to the matching types,
+    leaving both None if the file is empty. If stats is a dict, the bytes
+    read and the number of [type frequency] pairs (as hits) are added to it.
+    """
+    parsed = edn_types.read_type_freqs(file_path)
+    if parsed is not None:
+        record['type_names'], record['types'] = parsed
+    if stats is not None:
+        stats['bytes'] += os.path.getsize(file_path)
+        stats['hits'] += 0 if parsed is None else len(parsed[1])
+    return record
+
@@ -0,0 +1,76 @@
+"""
+Persistent per-directory cache of what the scrapers have already parsed.
+
+Each results directory gets a small JSON sidecar file per tool, recording
+for every log its inode, size and mtime along with whatever that tool
+needs to pick up where it left off. Logs that have not changed since the
+last scan can then be skipped entirely, and logs that have only grown can
+be resumed from a saved byte offset.
+"""
+
+import json
+import os
+
+CACHE_VERSION = 4
+
+
+def cache_path(directory, name):
+    return os.path.join(directory, f".{name}_cache.json")
+
+
+def load_cache(directory, name):
+    """
+    Returns the saved entries for this tool in directory, keyed by file name.
+    A missing, unreadable or out-of-date cache is treated as empty.
+    """
+    try:
+        with open(cache_path(directory, name), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+        return {}
+    return data.get('files', {})
+
+
+def save_cache(directory, name, entries):
+    """
+    Writes entries back to the sidecar file. The write goes through a
+    temporary file so a reader never sees a half-written cache, and a
+    results directory we can't write to just means no caching.
+    """
+    path = cache_path(directory, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'files': entries}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def file_signature(st):
+    """The parts of an os.stat_result that tell us whether a log changed."""
+    return {'inode': st.st_ino, 'size': st.st_size, 'mtime': st.st_mtime_ns}
+
+
+def is_unchanged(entry, st):
+    """True if the cached entry describes exactly this file as it is now."""
+    return entry is not None and \
+        entry.get('inode') == st.st_ino and \
+        entry.get('size') == st.st_size and \
+        entry.get('mtime') == st.st_mtime_ns
+
+
+def has_grown(entry, st):
+    """
+    True if the file is the same one we saw before and has only been
+    appended to, so parsing can resume from the cached offset.
+    """
+    return entry is not None and \
+        entry.get('inode') == st.st_ino and \
+        entry.get('size', 0) <= st.st_size
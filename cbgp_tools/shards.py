@@ -0,0 +1,183 @@
+"""
+Splitting a mass scrape into shards that run where the logs are, and
+merging the partial results.
+
+`mass --shard i/n` only looks at the runs that fall in shard i of n: each
+run goes to the shard given by a hash of its problem directory's name and
+its run number, so the split is the same on every machine however the
+directories are mounted, and a problem's runs are spread over all the
+shards. Instead of printing, the shard writes what it found to a small
+gzipped JSON partial file: per problem directory, each of its runs' status,
+type counts or size and diversity rows. merge_partials combines any number
+of partials into what one full scrape would have returned, so `merge`
+prints the same lines (and writes the same CSVs) that `mass` would.
+"""
+
+import functools
+import gzip
+import json
+import os
+import zlib
+
+from . import run_log
+from .histogram import IntHistogram
+from .status import MISSING, SKIPPED
+
+PARTIAL_VERSION = 2
+
+
+def parse_shard(spec):
+    """Parses a --shard value "i/n" into (i, n), with 0 <= i < n."""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"expected i/n, got {spec!r}") from None
+    if not 0 <= index < count:
+        raise ValueError(f"need 0 <= i < n in {spec!r}")
+    return index, count
+
+
+def in_shard(shard, directory, run):
+    """Whether run number run of the problem in directory belongs to shard (i, n)."""
+    index, count = shard
+    problem = os.path.basename(os.path.normpath(directory))
+    return zlib.crc32(f"{problem}/{run}".encode('utf-8')) % count == index
+
+
+def selector(shard):
+    """A select function for the scrapers that keeps only shard's runs."""
+    return functools.partial(in_shard, shard)
+
+
+def encode_runs(kind, results):
+    """
+    The runs of one problem directory, as scraped for kind, in partial file
+    form: {run number as a string: that run's result}. For types, only the
+    runs' counts are kept here; the directory's merged frequency histogram
+    goes in the partial file's 'freqs'.
+    """
+    if kind == 'sizes':
+        return {str(int(record['run'])): {
+                    'generation': record['generation'],
+                    'solution': record['solution'],
+                    'generalized': record['generalized'],
+                    'size': record['size'],
+                    'rows': [[row[field] for field in run_log.ROW_FIELDS] for row in record['rows']],
+                } for record in results}
+
+    if kind == 'types':
+        results = results[0]
+    runs = {}
+    for i, result in enumerate(results):
+        # Missing runs are left out too: every shard would see them, and
+        # decode_runs fills in the gaps
+        if result is SKIPPED or result == MISSING:
+            continue
+        if result is None:
+            runs[str(i)] = None
+        elif kind == 'types':
+            runs[str(i)] = list(result)
+        else:
+            runs[str(i)] = [result['generation'], result['solution'], result['generalized']]
+    return runs
+
+
+def decode_runs(kind, runs, freqs=None):
+    """
+    Turns the merged runs of one problem directory back into what the
+    scraper for kind returns for a directory: a list of run statuses, a
+    list of type counts along with freqs (the merged IntHistogram), or a
+    list of run records.
+    """
+    if kind == 'sizes':
+        records = []
+        for run in sorted(runs, key=int):
+            record = run_log.new_record(run)
+            record.update((key, value) for key, value in runs[run].items() if key != 'rows')
+            record['rows'] = [dict(zip(run_log.ROW_FIELDS, row)) for row in runs[run]['rows']]
+            records.append(record)
+        return records
+
+    # Run numbers in no partial, whether they have no file or their shard's
+    # partial wasn't given, come back as missing
+    results = []
+    for run in range(max(map(int, runs), default=-1) + 1):
+        result = runs.get(str(run), MISSING)
+        if result is not None and result != MISSING and kind == 'types':
+            result = tuple(result)
+        elif result is not None and result != MISSING:
+            result = dict(zip(('generation', 'solution', 'generalized'), result))
+        results.append(result)
+    if kind == 'types':
+        return results, freqs
+    return results
+
+
+def write_partial(path, kind, shard, directories, all_results):
+    """Writes the results of a sharded scrape of directories to a partial file at path."""
+    partial = {
+        'version': PARTIAL_VERSION,
+        'kind': kind,
+        'shard': list(shard),
+        'directories': {directory: encode_runs(kind, results)
+                        for directory, results in zip(directories, all_results)},
+    }
+    if kind == 'types':
+        partial['freqs'] = {directory: freqs.to_dict()
+                            for directory, (_, freqs) in zip(directories, all_results)}
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(partial, f, separators=(',', ':'))
+
+
+def read_partial(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        partial = json.load(f)
+    if partial.get('version') != PARTIAL_VERSION:
+        raise ValueError(f"{path} was written by a different version of cbgp_tools")
+    return partial
+
+
+def merge_partials(paths):
+    """
+    Reads and combines the partial files at paths. Returns (kind, a path
+    for each problem in name order, the results for each problem as its
+    scraper would return them, shards missing from the set or [] if none
+    are). A run that turns up in more than one partial is an error.
+    """
+    partials = [read_partial(path) for path in paths]
+    if not partials:
+        raise ValueError("no partial files given")
+    kinds = {partial['kind'] for partial in partials}
+    if len(kinds) > 1:
+        raise ValueError(f"the partial files are of different kinds ({', '.join(sorted(kinds))})")
+    kind = kinds.pop()
+
+    # Each node may have the directories mounted somewhere else, so runs are
+    # matched up by problem name, the same name in_shard hashes, and each
+    # problem is shown with its path in the lowest-numbered shard
+    merged = {}
+    merged_freqs = {}
+    shown = {}
+    for path, partial in sorted(zip(paths, partials), key=lambda item: item[1]['shard'][0]):
+        for directory, runs in partial['directories'].items():
+            problem = os.path.basename(os.path.normpath(directory))
+            shown.setdefault(problem, directory)
+            merged_runs = merged.setdefault(problem, {})
+            for run, result in runs.items():
+                if run in merged_runs:
+                    raise ValueError(f"run {run} of {problem} is in more than one partial (again in {path})")
+                merged_runs[run] = result
+            if kind == 'types':
+                merged_freqs.setdefault(problem, IntHistogram()).merge(
+                    IntHistogram.from_dict(partial['freqs'][directory]))
+
+    counts = {partial['shard'][1] for partial in partials}
+    missing = []
+    if len(counts) == 1:
+        count = counts.pop()
+        missing = sorted(set(range(count)) - {partial['shard'][0] for partial in partials})
+
+    # In problem name order, as mass prints them
+    problems = sorted(merged)
+    return kind, [shown[problem] for problem in problems], \
+        [decode_runs(kind, merged[problem], merged_freqs.get(problem)) for problem in problems], missing
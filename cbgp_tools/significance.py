@@ -0,0 +1,258 @@
+"""
+Significance tests between every pair of configurations on every problem.
+
+compare() reads run outcomes and each finished run's final size and
+diversity from an experiment index (see experiment_index), pairs up every
+two configurations that ran the same problem, and tests them all at once:
+
+    solutions     Fisher's exact test on solutions out of finished runs
+    generalized   the same, on generalized solutions
+    <metric>      Mann-Whitney U test on the metric's value in each
+                  finished run's last generation
+
+The tests work on whole arrays of comparisons rather than one pair at a
+time, so thousands of them take a second or two, most of it reading the
+index. The p-values of each
+test are then corrected for multiple comparisons as one family, across all
+problems and pairs, with one of CORRECTIONS.
+"""
+
+import itertools
+import math
+
+import numpy as np
+
+from . import experiment_index
+
+DEFAULT_METRICS = ('codeSizeMean', 'genomeSizeMean', 'uniqueBehaviors')
+
+# Fisher's test counts tables as extreme as the observed one up to this
+# relative tolerance, as R and SciPy do, so rounding doesn't drop ties
+_RELATIVE_TOLERANCE = 1e-7
+
+_erfc = np.vectorize(math.erfc, otypes=[float])
+
+
+def _log_choose(log_fact, n, r):
+    return log_fact[n] - log_fact[r] - log_fact[n - r]
+
+
+def fisher_exact(a, n1, c, n2):
+    """
+    Two-sided p-values of Fisher's exact test for the 2x2 tables with a
+    successes out of n1 and c out of n2, one table per array element. Each
+    p-value sums the hypergeometric probabilities of every table with the
+    same margins that is no more likely than the observed one.
+    """
+    a, n1, c, n2 = (np.asarray(v, dtype=np.int64) for v in (a, n1, c, n2))
+    if a.size == 0:
+        return np.zeros(0)
+    k = a + c
+    n = n1 + n2
+    log_fact = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, n.max() + 1)))))
+
+    # Every possible count in the first group, one row per table
+    x = np.arange(n1.max() + 1)[None, :]
+    low = np.maximum(0, k - n2)[:, None]
+    high = np.minimum(k, n1)[:, None]
+    possible = (x >= low) & (x <= high)
+    x = np.where(possible, x, low)
+
+    def log_pmf(x, n1, n2, k, n):
+        return _log_choose(log_fact, n1, x) + _log_choose(log_fact, n2, k - x) - _log_choose(log_fact, n, k)
+
+    observed = log_pmf(a, n1, n2, k, n)[:, None]
+    log_p = log_pmf(x, n1[:, None], n2[:, None], k[:, None], n[:, None])
+    extreme = possible & (log_p <= observed + _RELATIVE_TOLERANCE)
+    return np.minimum(np.where(extreme, np.exp(log_p), 0.0).sum(axis=1), 1.0)
+
+
+def odds_ratio(a, n1, c, n2):
+    """The sample odds ratio of each 2x2 table (inf or nan when a cell is 0)."""
+    a, n1, c, n2 = (np.asarray(v, dtype=float) for v in (a, n1, c, n2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return a * (n2 - c) / ((n1 - a) * c)
+
+
+def mann_whitney(samples1, samples2):
+    """
+    Mann-Whitney U tests of each pair of samples, returning (U of the first
+    samples, two-sided p-values). The p-values use the normal approximation
+    with tie and continuity corrections (like R's wilcox.test with
+    exact=FALSE), which is accurate for the dozens of runs per
+    configuration experiments have; a pair with an empty sample gets nan.
+
+    All the comparisons are ranked together: their values go into one
+    array, sorted by comparison and then value, so one sort gives every
+    value's rank and every group of ties.
+    """
+    m = len(samples1)
+    n1 = np.array([len(s) for s in samples1], dtype=float)
+    n2 = np.array([len(s) for s in samples2], dtype=float)
+    if m == 0:
+        return np.zeros(0), np.zeros(0)
+
+    sizes = (n1 + n2).astype(np.int64)
+    values = np.concatenate([np.zeros(0)] + [np.concatenate((s1, s2)) for s1, s2 in zip(samples1, samples2)])
+    comparison = np.repeat(np.arange(m), sizes)
+    row_start = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    in_first = np.arange(len(values)) - row_start[comparison] < n1[comparison]
+
+    order = np.lexsort((values, comparison))
+    sorted_values = values[order]
+    sorted_comparison = comparison[order]
+    new_group = np.ones(len(values), dtype=bool)
+    new_group[1:] = (sorted_values[1:] != sorted_values[:-1]) | (sorted_comparison[1:] != sorted_comparison[:-1])
+    group = np.cumsum(new_group) - 1
+    group_start = np.flatnonzero(new_group)
+    group_size = np.diff(np.append(group_start, len(values)))
+
+    # Tied values share the average of the ranks they span
+    ranks = np.empty(len(values))
+    ranks[order] = group_start[group] - row_start[sorted_comparison] + (group_size[group] + 1) / 2
+    u1 = np.bincount(comparison, weights=np.where(in_first, ranks, 0), minlength=m) - n1 * (n1 + 1) / 2
+    ties = np.bincount(sorted_comparison[group_start], weights=group_size ** 3 - group_size, minlength=m)
+
+    n = n1 + n2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+        z = np.maximum(np.abs(u1 - n1 * n2 / 2) - 0.5, 0) / sigma
+    p = np.minimum(_erfc(z / math.sqrt(2)), 1.0)
+    p[(n1 == 0) | (n2 == 0) | ~(sigma > 0)] = np.nan
+    return u1, p
+
+
+def holm(p):
+    order = np.argsort(p)
+    m = len(p)
+    adjusted = np.maximum.accumulate((m - np.arange(m)) * p[order])
+    result = np.empty(m)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+
+def benjamini_hochberg(p):
+    order = np.argsort(p)
+    m = len(p)
+    adjusted = np.minimum.accumulate((m / np.arange(1, m + 1) * p[order])[::-1])[::-1]
+    result = np.empty(m)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+
+def bonferroni(p):
+    return np.minimum(len(p) * p, 1.0)
+
+
+CORRECTIONS = {
+    'holm': holm,
+    'bh': benjamini_hochberg,
+    'bonferroni': bonferroni,
+    'none': lambda p: p.copy(),
+}
+
+
+def adjust(p, correction):
+    """Corrects p for multiple comparisons; nan p-values are left out of the family and stay nan."""
+    p = np.asarray(p, dtype=float)
+    result = np.full(len(p), np.nan)
+    tested = ~np.isnan(p)
+    result[tested] = CORRECTIONS[correction](p[tested])
+    return result
+
+
+def load_outcomes(conn):
+    """{(problem, config): (finished runs, solutions, generalized solutions)}"""
+    return {(problem, config): (finished, solutions, generalized)
+            for problem, config, finished, solutions, generalized in conn.execute("""
+                SELECT d.problem, d.config, COUNT(r.solution),
+                       COALESCE(SUM(r.solution), 0), COALESCE(SUM(r.generalized), 0)
+                FROM directories d JOIN runs r ON r.directory_id = d.id
+                GROUP BY d.problem, d.config""")}
+
+
+def load_final_values(conn, metric):
+    """{(problem, config): array of metric in each finished run's last generation that has it}"""
+    if metric not in experiment_index.METRICS:
+        raise ValueError(f"metric must be one of {', '.join(experiment_index.METRICS)}")
+
+    values = {}
+    # With a single MAX(), SQLite takes the other columns from the row that has it
+    for problem, config, value, _ in conn.execute(f"""
+            SELECT d.problem, d.config, g.{metric}, MAX(g.generation)
+            FROM generations g
+            JOIN runs r ON r.directory_id = g.directory_id AND r.run = g.run
+            JOIN directories d ON d.id = g.directory_id
+            WHERE r.solution IS NOT NULL AND g.{metric} IS NOT NULL
+            GROUP BY g.directory_id, g.run"""):
+        values.setdefault((problem, config), []).append(value)
+    return {key: np.array(vals, dtype=float) for key, vals in values.items()}
+
+
+def config_pairs(keys):
+    """Every (problem, config 1, config 2) with both configurations run on the problem, sorted."""
+    configs = {}
+    for problem, config in keys:
+        configs.setdefault(problem, set()).add(config)
+    return [(problem, config1, config2)
+            for problem in sorted(configs)
+            for config1, config2 in itertools.combinations(sorted(configs[problem]), 2)]
+
+
+HEADER = ["problem", "config1", "config2", "test", "n1", "n2", "value1", "value2",
+          "statistic", "p", "pAdjusted"]
+
+
+def compare(db_path, metrics=DEFAULT_METRICS, correction='holm'):
+    """
+    Runs every test between every pair of configurations in the index at
+    db_path. Returns (HEADER, rows), one row per problem, pair and test.
+    value1 and value2 are the success rates (for the exact tests) or the
+    medians (for the metrics), and statistic is the odds ratio or U.
+    """
+    if correction not in CORRECTIONS:
+        raise ValueError(f"correction must be one of {', '.join(CORRECTIONS)}")
+    conn = experiment_index.connect_read_only(db_path)
+    try:
+        outcomes = load_outcomes(conn)
+        finals = {metric: load_final_values(conn, metric) for metric in metrics}
+    finally:
+        conn.close()
+
+    rows = []
+    pairs = config_pairs(outcomes)
+    if pairs:
+        counts = np.array([outcomes[(problem, config1)] + outcomes[(problem, config2)]
+                           for problem, config1, config2 in pairs], dtype=np.int64)
+        n1, n2 = counts[:, 0], counts[:, 3]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for test, a, c in (('solutions', counts[:, 1], counts[:, 4]),
+                               ('generalized', counts[:, 2], counts[:, 5])):
+                p = fisher_exact(a, n1, c, n2)
+                rows.append((test, n1, n2, a / n1, c / n2, odds_ratio(a, n1, c, n2), p))
+
+    empty = np.zeros(0)
+    for metric in metrics:
+        samples1 = [finals[metric].get((problem, config1), empty) for problem, config1, _ in pairs]
+        samples2 = [finals[metric].get((problem, config2), empty) for problem, _, config2 in pairs]
+        u, p = mann_whitney(samples1, samples2)
+        medians = {key: np.median(vals) for key, vals in finals[metric].items()}
+        medians1 = np.array([medians.get((problem, config1), np.nan) for problem, config1, _ in pairs])
+        medians2 = np.array([medians.get((problem, config2), np.nan) for problem, _, config2 in pairs])
+        rows.append((metric, np.array([len(s) for s in samples1]), np.array([len(s) for s in samples2]),
+                     medians1, medians2, u, p))
+
+    table = []
+    for test, n1, n2, value1, value2, statistic, p in rows:
+        p_adjusted = adjust(p, correction)
+        for i, (problem, config1, config2) in enumerate(pairs):
+            table.append((problem, config1, config2, test, int(n1[i]), int(n2[i]),
+                          _cell(value1[i]), _cell(value2[i]), _cell(statistic[i]),
+                          _cell(p[i]), _cell(p_adjusted[i])))
+    table.sort(key=lambda row: row[:3])
+    return HEADER, table
+
+
+def _cell(value):
+    value = float(value)
+    return "" if value != value else value
@@ -0,0 +1,382 @@
+"""
+Per-generation code size, genome size and diversity statistics scraped
+from the run logs in a results directory.
+"""
+
+import csv
+import os
+import sys
+
+from . import profiling, run_files, run_log, scan_cache
+from .compression import is_compressed
+
+def print_progress_bar(iteration, total, length=40):
+    """
+    Helper function to print a text-based progress bar to the console.
+    """
+    percent = ("{0:.1f}").format(100 * (iteration / float(total)))
+    filled_length = int(length * iteration // total)
+    bar = '█' * filled_length + '-' * (length - filled_length)
+    sys.stdout.write(f'\rProgress: |{bar}| {percent}% Complete ({iteration}/{total})')
+    sys.stdout.flush()
+
+CACHE_NAME = "size_and_diversity"
+
+# The generation index: for every log, the byte offset of each STARTING line
+GEN_INDEX_NAME = "generation_index"
+
+# The run's status and where to resume parsing, kept in its cache entry
+# next to its rows
+CACHED_KEYS = ('run', 'generation', 'solution', 'generalized', 'offset', 'inode', 'size', 'mtime')
+
+def cache_entry(record):
+    """
+    The scan cache entry for a parsed record: its status, resume offset and
+    file signature, and each of its rows as one string, the ROW_FIELDS
+    after runNumber (which is the same in every row) joined by commas the
+    way they are in the CSV. The scraped values never hold a comma. The
+    STARTING offsets are left to the generation index, which keeps them
+    anyway.
+    """
+    entry = {key: record[key] for key in CACHED_KEYS}
+    entry['rows'] = [",".join(row[field] for field in run_log.ROW_FIELDS[1:]) for row in record['rows']]
+    return entry
+
+def record_from_cache(entry):
+    """Turns a cache_entry back into a run record, with 'starts' None as they aren't cached."""
+    record = run_log.new_record(entry['run'])
+    record.update((key, entry[key]) for key in CACHED_KEYS)
+    record['rows'] = [dict(zip(run_log.ROW_FIELDS, [entry['run']] + row.split(","))) for row in entry['rows']]
+    record['starts'] = None
+    return record
+
+def parse_file_cached(file_path, run_number, st, entry, index=None, stats=None):
+    """
+    Parses one log into a run record (see run_log), starting from entry,
+    this file's scan cache entry (or None). Unchanged files are not opened
+    at all, and files that have grown are only parsed from the start of
+    their last (possibly unfinished) generation onward. index is the file's
+    generation index entry (or None): when it describes the same file as
+    entry, a resumed record gets its complete 'starts' from it. Otherwise,
+    and for unchanged files, the record's 'starts' is None.
+    """
+    if scan_cache.is_unchanged(entry, st):
+        return record_from_cache(entry)
+
+    record = run_log.new_record(run_number)
+    if scan_cache.has_grown(entry, st):
+        # The last cached row is the generation that starts at the saved
+        # offset, which gets parsed again in case more of it was written
+        old = record_from_cache(entry)
+        record['rows'] = old['rows'][:-1]
+        indexed = index is not None and index['starts'] and \
+            all(index.get(key) == entry[key] for key in ('inode', 'size', 'mtime'))
+        if indexed:
+            record['starts'] = index['starts'][:-1]
+        run_log.parse_log(file_path, record, entry['offset'], stats)
+        if not indexed:
+            record['starts'] = None
+    else:
+        run_log.parse_log(file_path, record, stats=stats)
+
+    record.update(scan_cache.file_signature(st))
+    return record
+
+def parse_gens(spec):
+    """
+    Parses a --gens value, start:stop:step like a Python slice (any part can
+    be left out, and a single number means just that generation), into a
+    (start, stop, step) tuple with stop None for no limit.
+    """
+    parts = spec.split(':')
+    if len(parts) > 3:
+        raise ValueError(f"expected start:stop:step, got {spec!r}")
+    if len(parts) == 1 and parts[0].strip():
+        parts = [parts[0], str(int(parts[0]) + 1)]
+    parts += [''] * (3 - len(parts))
+    start = int(parts[0]) if parts[0].strip() else 0
+    stop = int(parts[1]) if parts[1].strip() else None
+    step = int(parts[2]) if parts[2].strip() else 1
+    if start < 0 or step < 1:
+        raise ValueError(f"start must be >= 0 and step >= 1 in {spec!r}")
+    if stop is not None and stop <= start:
+        raise ValueError(f"stop must be greater than start in {spec!r}")
+    return start, stop, step
+
+def is_wanted(generation, gens):
+    start, stop, step = gens
+    return generation >= start and (stop is None or generation < stop) and \
+        (generation - start) % step == 0
+
+def index_entry(record):
+    """The generation index entry for a parsed record."""
+    return {'inode': record['inode'], 'size': record['size'], 'mtime': record['mtime'],
+            'starts': record['starts']}
+
+def extract_generations(file_path, run_number, st, entry, gens, stats=None):
+    """
+    Parses only the generations of one log that gens selects. entry is the
+    log's generation index entry (or None); with it, each selected
+    generation is read by seeking straight to its STARTING line and
+    stopping at the next one, and the bytes in between are never read. If
+    the log has grown, it is parsed from its last indexed generation on,
+    which indexes the new ones too. Without a usable index (or for a
+    compressed log, which can't be seeked in cheaply) the whole log is
+    parsed. Returns a record whose rows are the selected generations and
+    whose 'starts' is the log's complete index. Its status fields are only
+    filled in when the end of the log had to be read.
+    """
+    record = run_log.new_record(run_number)
+    if is_compressed(file_path) or not scan_cache.has_grown(entry, st) or not entry['starts']:
+        run_log.parse_log(file_path, record, stats=stats)
+        record['rows'] = [row for row in record['rows'] if is_wanted(int(row['generation']), gens)]
+        record.update(scan_cache.file_signature(st))
+        return record
+
+    if scan_cache.is_unchanged(entry, st):
+        known = entry['starts']
+        new_rows = []
+        record['starts'] = list(known)
+        record['offset'] = known[-1][1]
+    else:
+        # The last indexed generation may not have been complete, so it is
+        # parsed again along with everything written after it
+        known = entry['starts'][:-1]
+        run_log.parse_log(file_path, record, entry['starts'][-1][1], stats)
+        new_rows = [row for row in record['rows'] if is_wanted(int(row['generation']), gens)]
+        record['starts'] = known + record['starts']
+
+    starts = record['starts']
+    rows = []
+    for i, (generation, offset) in enumerate(known):
+        if is_wanted(generation, gens):
+            stop = starts[i + 1][1] if i + 1 < len(starts) else None
+            part = run_log.new_record(run_number)
+            run_log.parse_log(file_path, part, offset, stats, stop)
+            rows.extend(part['rows'])
+
+    record['rows'] = rows + new_rows
+    record.update(scan_cache.file_signature(st))
+    return record
+
+def parse_file_worker(file_path, run_number, st, entry, gens=None, index=None, stats=None):
+    """
+    Runs parse_file_cached (or extract_generations, if gens is given),
+    turning a failure into an error message so one bad file doesn't take
+    down a whole pool of workers. Returns (record, error message or None).
+    """
+    try:
+        if gens is not None:
+            return extract_generations(file_path, run_number, st, index, gens, stats), None
+        return parse_file_cached(file_path, run_number, st, entry, index, stats), None
+    except Exception as e:
+        return None, str(e)
+
+def find_logs(folder_path, profile=None):
+    """
+    Returns (path, run number, stat result) for every runN.txt in folder_path,
+    sorted by run number, from one listing of the folder (see run_files).
+    Compressed logs (runN.txt.gz, ...) are included, but if a run has both,
+    the uncompressed one is used.
+    """
+    with profiling.phase(profile, 'listdir'):
+        found = run_files.find_runs(folder_path, "run", ".txt")
+    runs = sorted(found)
+    with profiling.phase(profile, 'stat'):
+        stats = run_files.stat_entries(found[run] for run in runs)
+    return [(found[run].path, str(run), st) for run, st in zip(runs, stats)]
+
+def iter_records(folders, use_cache=True, jobs=1, on_file=None, max_pending=None, profile=None,
+                 gens=None, use_index=None, select=None, logs=None):
+    """
+    Parses every runN.txt in each of folders, reading the logs of all the
+    folders in one pool of jobs processes, and yields (folder index, run
+    record) pairs in folder order and then run number order. on_file, if
+    given, is called as on_file(done, total, filename, error) after each log.
+    max_pending limits how many parsed logs can be waiting to be consumed.
+    profile, if given, is a profiling.Profile to record the time of each
+    phase in.
+
+    With gens (see parse_gens), only those generations are parsed, through
+    extract_generations, and the records' rows are just those generations.
+    Every parse keeps each folder's generation index up to date, unless
+    use_index (which defaults to use_cache) is False.
+
+    select, if given, is called as select(folder, run number) for each log,
+    and only the logs it returns True for are parsed. logs, if given, is
+    what find_logs returned for each of folders, for a caller that has
+    already listed them.
+    """
+    if use_index is None:
+        use_index = use_cache
+    use_cache = use_cache and gens is None
+
+    caches = []
+    indexes = []
+    tasks = []
+    for i, folder_path in enumerate(folders):
+        with profiling.phase(profile, 'cache load'):
+            cache = scan_cache.load_cache(folder_path, CACHE_NAME) if use_cache else {}
+            index = scan_cache.load_cache(folder_path, GEN_INDEX_NAME) if use_index else {}
+        caches.append(cache)
+        indexes.append(index)
+        for file_path, run_number, st in find_logs(folder_path, profile) if logs is None else logs[i]:
+            if select is not None and not select(folder_path, int(run_number)):
+                continue
+            filename = os.path.basename(file_path)
+            tasks.append((len(caches) - 1, filename,
+                          (file_path, run_number, st, cache.get(filename), gens, index.get(filename))))
+
+    results = profiling.profiled_imap(parse_file_worker, [task[2] for task in tasks], jobs,
+                                      profile, max_pending)
+    for i, ((folder_index, filename, _), (record, error)) in enumerate(zip(tasks, results)):
+        if error is None:
+            if use_cache:
+                caches[folder_index][filename] = cache_entry(record)
+            # A record without 'starts' came from the cache, and the index
+            # entry it would replace is still right for the file
+            if use_index and record['starts'] is not None:
+                indexes[folder_index][filename] = index_entry(record)
+            yield folder_index, record
+        if on_file is not None:
+            on_file(i + 1, len(tasks), filename, error)
+
+    with profiling.phase(profile, 'cache save'):
+        for folder_path, cache, index in zip(folders, caches, indexes):
+            if use_cache:
+                scan_cache.save_cache(folder_path, CACHE_NAME, cache)
+            if use_index:
+                scan_cache.save_cache(folder_path, GEN_INDEX_NAME, index)
+
+def scrape(folders, use_cache=True, jobs=1, on_file=None, profile=None, gens=None, select=None,
+           logs=None):
+    """
+    Like iter_records, but returns one list per folder of run records,
+    sorted by run number.
+    """
+    all_records = [[] for _ in folders]
+    for folder_index, record in iter_records(folders, use_cache, jobs, on_file, profile=profile,
+                                             gens=gens, select=select, logs=logs):
+        all_records[folder_index].append(record)
+    return all_records
+
+def stream_rows(records, output_filename):
+    """
+    Writes the generation rows of each record to a CSV as soon as that record
+    is produced, so only one run's rows are held at a time. records must
+    already come in run number order, as iter_records yields them.
+    """
+    with open(output_filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=run_log.ROW_FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerows(sorted(record['rows'], key=lambda x: int(x['generation'])))
+            csvfile.flush()
+
+def write_rows(records, output_filename):
+    """Writes the generation rows of records to a CSV, sorted by run and generation."""
+    rows = [row for record in records for row in record['rows']]
+    rows.sort(key=lambda x: (int(x['runNumber']), int(x['generation'])))
+
+    with open(output_filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=run_log.ROW_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def write_npz(records, output_filename):
+    """
+    Writes the generation rows of records as a NumPy .npz archive with one
+    typed array per column: int32 runNumber and generation, and float64
+    metrics with Clojure ratios already converted and missing values as NaN.
+    """
+    import numpy as np
+
+    rows = [row for record in records for row in record['rows']]
+    rows.sort(key=lambda x: (int(x['runNumber']), int(x['generation'])))
+
+    columns = {}
+    for field in run_log.ROW_FIELDS:
+        if field in ('runNumber', 'generation'):
+            columns[field] = np.array([int(row[field]) for row in rows], dtype=np.int32)
+        else:
+            columns[field] = np.array([run_log.to_float(row[field]) for row in rows], dtype=np.float64)
+
+    # np.savez adds .npz to names that don't already end in it
+    with open(output_filename, 'wb') as f:
+        np.savez(f, **columns)
+
+def output_name_for(folder, extension="csv"):
+    """The default output name for a folder, built from its parent and its own name."""
+
+    # 1. Get the Absolute Path
+    abs_folder_path = os.path.abspath(folder)
+
+    # 2. Get the base name (current dir) and parent dir name
+    folder_name = os.path.basename(abs_folder_path)
+    parent_path = os.path.dirname(abs_folder_path)
+    parent_name = os.path.basename(parent_path)
+
+    # 3. Construct filename
+    return f"{parent_name}-{folder_name}-size-and-diversity.{extension}"
+
+def parse_logs(folder_path, output_filename, use_cache=True, jobs=1, output_format="csv", stream=False,
+               profile=None, gens=None):
+    """
+    Scrapes genetic programming logs for run number, generation,
+    code size stats, genome size stats, and unique behaviors. Raises
+    OSError if folder_path doesn't exist or can't be listed.
+    """
+
+    # 1. Check directory existence
+    if not os.path.isdir(folder_path):
+        raise FileNotFoundError(f"The directory '{folder_path}' does not exist.")
+
+    print(f"Scanning directory: {os.path.abspath(folder_path)}...")
+
+    # 2. Identify valid files first
+    try:
+        logs = find_logs(folder_path, profile)
+    except OSError as e:
+        raise OSError(f"Can't access directory {folder_path}: {e}") from e
+    total_files = len(logs)
+
+    if total_files == 0:
+        print("No matching 'runN.txt' files found.")
+        return
+
+    print(f"Found {total_files} logs. Starting processing...")
+    print_progress_bar(0, total_files)
+
+    def on_file(done, total, filename, error):
+        if error is not None:
+            sys.stdout.write('\r' + ' ' * 80 + '\r')
+            print(f"Error reading file {filename}: {error}")
+
+        # Update Progress Bar
+        print_progress_bar(done, total)
+
+    # 3. Process files
+    if stream:
+        # Write each run as soon as it is parsed, keeping memory bounded by
+        # a few runs. This doesn't update the scan cache, since the cache
+        # would have to hold on to every row until the end.
+        records = iter_records([folder_path], False, jobs, on_file, max_pending=2 * jobs,
+                               profile=profile, gens=gens, use_index=use_cache, logs=[logs])
+        stream_rows((record for _, record in records), output_filename)
+        print()
+        print(f"Done. Data written to: {os.path.abspath(output_filename)}")
+        return
+
+    records = scrape([folder_path], use_cache, jobs, on_file, profile, gens, logs=[logs])[0]
+
+    print() # New line after bar finishes
+
+    # 4. Sort and Write to CSV (or .npz)
+    print("Sorting and saving data...")
+    with profiling.phase(profile, 'output'):
+        if output_format == "npz":
+            write_npz(records, output_filename)
+        else:
+            write_rows(records, output_filename)
+
+    print(f"Done. Data written to: {os.path.abspath(output_filename)}")
@@ -0,0 +1,393 @@
+"""
+Solution counts for a results directory: which runs have finished, found a
+solution on the training set, and generalized to the test set. Everything
+here only reads the end of each run log.
+"""
+
+import os
+import sys
+
+from . import profiling, run_files, run_log, scan_cache
+from .compression import is_compressed, is_empty
+
+outputFilePrefix = "run"
+outputFileSuffix = ".txt"
+
+CACHE_NAME = "status"
+
+# Stand in for the runs a scrape was told to leave out (see scrape's
+# select), and for run numbers below the highest one that have no log
+SKIPPED = "skipped"
+MISSING = "missing"
+
+
+def scan_run_status(filename, use_mmap=False, stats=None):
+    """
+    Reads the end of a run log and returns (generation, solution, generalized),
+    where generation is the last generation started (or None), solution is
+    True/False once the run has finished and None while it is still going,
+    and generalized is True if the solution also passed the test set.
+    """
+    record = run_log.scan_status(filename, run_log.new_record(None), use_mmap, stats)
+    return record['generation'], record['solution'], record['generalized']
+
+
+def scan_run_status_worker(filename, use_mmap=False, stats=None):
+    """
+    Runs scan_run_status, turning a failure (a truncated archive, say, or a
+    .zst log without zstandard installed) into an error message so one bad
+    file doesn't take down the whole scrape. Returns (status, error message
+    or None).
+    """
+    try:
+        return scan_run_status(filename, use_mmap, stats), None
+    except Exception as e:
+        return None, str(e)
+
+
+def find_run_files(outputDirectory):
+    """
+    Returns {run number: os.DirEntry} for every runN.txt in outputDirectory,
+    including any after a gap in the numbering. Compressed logs
+    (run3.txt.gz, ...) count too.
+    """
+    return run_files.find_runs(outputDirectory, outputFilePrefix, outputFileSuffix)
+
+
+def scrape(outputDirectories, use_mmap=False, use_cache=True, jobs=1, profile=None, select=None):
+    """
+    Gets the status of every run in each of outputDirectories, which must end in '/'.
+    Returns one list per directory whose i-th element is None if run i has not
+    started yet, MISSING if it has no log although later runs do, and
+    otherwise a dict with the run's generation, solution and generalized
+    values as returned by scan_run_status. A log that can't be read is
+    reported on stderr and counts as MISSING. The logs that need to be read,
+    across all directories, are spread over jobs processes, and their stat
+    calls over run_files.STAT_THREADS threads. profile, if given, is a
+    profiling.Profile to record the time of each phase in.
+    select, if given, is called as select(outputDirectory, i) for each run,
+    and the runs it returns False for are not looked at and come back as
+    SKIPPED.
+    """
+    all_runs = []
+    caches = []
+    to_scan = []
+
+    for outputDirectory in outputDirectories:
+        with profiling.phase(profile, 'cache load'):
+            cache = scan_cache.load_cache(outputDirectory, CACHE_NAME) if use_cache else {}
+        caches.append(cache)
+
+        with profiling.phase(profile, 'listdir'):
+            found = find_run_files(outputDirectory)
+
+        runs = []
+        with profiling.phase(profile, 'stat'):
+            wanted = sorted(i for i in found if select is None or select(outputDirectory, i))
+            stats = dict(zip(wanted, run_files.stat_entries(found[i] for i in wanted)))
+            for i in range(max(found, default=-1) + 1):
+                if i not in found:
+                    runs.append(MISSING)
+                    continue
+                if i not in stats:
+                    runs.append(SKIPPED)
+                    continue
+                fileName = found[i].name
+                st = stats[i]
+                # Only logs with data are cached, so an unchanged cached log
+                # isn't opened at all, not even to see if it is empty
+                entry = cache.get(fileName)
+                if scan_cache.is_unchanged(entry, st):
+                    runs.append(entry)
+                    continue
+                cache.pop(fileName, None)
+                try:
+                    empty = is_empty(outputDirectory + fileName, st.st_size)
+                except Exception as e:
+                    print(f"Error reading file {outputDirectory + fileName}: {e}", file=sys.stderr)
+                    runs.append(MISSING)
+                    continue
+                if empty:
+                    runs.append(None)
+                    continue
+
+                # The status only depends on the end of the log, which is cheap
+                # to re-read, so a grown log is simply scanned from the end again.
+                # Compressed logs have to be decompressed to find their end, but
+                # they are archived and don't change, so that happens only once
+                entry = scan_cache.file_signature(st)
+                to_scan.append((outputDirectory + fileName, fileName, entry, cache, runs, len(runs)))
+                runs.append(entry)
+        all_runs.append(runs)
+
+    statuses = profiling.profiled_imap(scan_run_status_worker,
+                                       [(path, use_mmap) for path, _, _, _, _, _ in to_scan],
+                                       jobs, profile)
+    for (path, fileName, entry, cache, runs, i), (status, error) in zip(to_scan, statuses):
+        if error is not None:
+            # Left out of the cache, so it is tried again next time
+            print(f"Error reading file {path}: {error}", file=sys.stderr)
+            runs[i] = MISSING
+            continue
+        generation, solution, generalized = status
+        entry.update(generation=generation, solution=solution, generalized=generalized)
+        cache[fileName] = entry
+
+    if use_cache:
+        with profiling.phase(profile, 'cache save'):
+            for outputDirectory, cache in zip(outputDirectories, caches):
+                scan_cache.save_cache(outputDirectory, CACHE_NAME, cache)
+
+    return all_runs
+
+
+def scrape_and_print(outputDirectory, verbose, as_csv, use_mmap=False, use_cache=True, jobs=1,
+                     profile=None):
+    """Scrapes and prints from outputDirectory"""
+
+    if outputDirectory[-1] != '/':
+        outputDirectory += '/'
+
+    if not as_csv:
+        print()
+        print("           Directory of results:")
+        print(outputDirectory)
+
+    runs = scrape([outputDirectory], use_mmap, use_cache, jobs, profile)[0]
+    with profiling.phase(profile, 'output'):
+        print_runs(outputDirectory, runs, as_csv)
+
+
+def run_line(i, entry):
+    """The line of the per-run table for run i, given its status entry (or None)"""
+    if entry is None:
+        return f"Run {i:3} | Gen:  not started\n"
+    if entry == MISSING:
+        return f"Run {i:3} | missing\n"
+
+    generation = entry['generation']
+    solution = entry['solution']
+    generalized = entry['generalized']
+
+    if generation == None:
+        return ""
+
+    finished_str = "finished" if solution != None else " " * 8
+    train_str = "train success" if solution else " " * 13
+    test_str = "generalized" if generalized else ""
+    return f"Run {i:3} | Gen: {generation:>4} | {finished_str} | {train_str} | {test_str}\n"
+
+
+def summarize(runs):
+    """
+    Sorts the runs returned by scrape for one directory into lists of run
+    numbers: 'finished', 'solutions', 'failed', 'generalized', 'not_done'
+    and 'missing'.
+    """
+    summary = {'finished': [], 'solutions': [], 'failed': [], 'generalized': [], 'not_done': [],
+               'missing': []}
+
+    for i, entry in enumerate(runs):
+        if entry == MISSING:
+            summary['missing'].append(i)
+            continue
+        if entry is None or entry['solution'] == None:
+            summary['not_done'].append(i)
+            continue
+
+        summary['finished'].append(i)
+        if entry['solution']:
+            summary['solutions'].append(i)
+        else:
+            summary['failed'].append(i)
+        if entry['generalized']:
+            summary['generalized'].append(i)
+
+    return summary
+
+
+def print_runs(outputDirectory, runs, as_csv):
+    """Prints the statuses returned by scrape for one directory"""
+
+    per_run_info = ""
+
+    for i, entry in enumerate(runs):
+        if not as_csv:
+            sys.stdout.write("%4i" % i)
+            sys.stdout.flush()
+            if i % 25 == 24:
+                print()
+
+        per_run_info += run_line(i, entry)
+
+    if not as_csv:
+        print()
+        print(per_run_info)
+
+    summary = summarize(runs)
+
+    if as_csv:
+        if summary['missing']:
+            print_missing(outputDirectory, summary['missing'])
+        print("%s,%i,%i,%i" % (outputDirectory,
+                                  len(summary['finished']), 
+                                  len(summary['solutions']),
+                                  len(summary['generalized'])))
+
+    else:
+        print("------------------------------------------------------------")
+
+        print("Number of finished runs:            %4i" % len(summary['finished']))
+        print("Solutions found:                    %4i" % len(summary['solutions']))
+        print("Zero error on test set:             %4i" % len(summary['generalized']))
+
+        print("------------------------------------------------------------")
+
+        print("Not done yet: ", end="")
+        for run_i in summary['not_done']:
+            print("%i," % run_i, end="")
+        print()
+
+        if summary['missing']:
+            print("Missing logs: ", end="")
+            for run_i in summary['missing']:
+                print("%i," % run_i, end="")
+            print()
+
+        print("------------------------------------------------------------")
+
+
+def print_missing(outputDirectory, missing):
+    """Warns on stderr, so that CSV output stays clean, about runs with no file or an unreadable one."""
+    print(f"Warning: {outputDirectory} has no readable file for run(s) {', '.join(map(str, missing))}",
+          file=sys.stderr)
+
+
+class RunWatcher:
+    """
+    Follows one run log for --watch, reading only the bytes appended since
+    the last poll. The file is opened and closed again on each poll that
+    has something to read, so watching thousands of runs doesn't run out of
+    file descriptors.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+        self.entry = None
+
+    def _read(self, start, stop):
+        with open(self.filename, 'rb') as f:
+            f.seek(start)
+            return f.read(stop - start)
+
+    def poll(self):
+        """Brings self.entry up to date, and returns True if it changed."""
+        if self.entry is not None and self.entry['solution'] != None:
+            return False
+
+        try:
+            st = os.stat(self.filename)
+        except OSError:
+            return False
+
+        if is_compressed(self.filename):
+            # A compressed log can't be followed by its appended bytes, so it
+            # is scanned again whenever it changes, which archived logs don't.
+            # One that can't be read yet (still being written, say) is shown
+            # as not started until it changes again
+            if (st.st_ino, st.st_size) == (self.inode, self.offset):
+                return False
+            self.inode, self.offset = st.st_ino, st.st_size
+            status, error = scan_run_status_worker(self.filename)
+            if error is not None or status[0] is None:
+                return False
+            generation, solution, generalized = status
+            self.entry = {'generation': generation, 'solution': solution, 'generalized': generalized}
+            return True
+
+        if st.st_size == 0:
+            return False
+
+        if self.inode is None or st.st_ino != self.inode or st.st_size < self.offset:
+            # First look at this log, or it was replaced: get the status from
+            # the end of the file, then follow it from its last full line
+            status, error = scan_run_status_worker(self.filename)
+            try:
+                tail = self._read(max(0, st.st_size - 8192), st.st_size)
+            except OSError:
+                return False
+            if error is not None:
+                return False
+            generation, solution, generalized = status
+            self.entry = {'generation': generation, 'solution': solution, 'generalized': generalized}
+            self.inode = st.st_ino
+            self.offset = st.st_size
+            self.partial = tail[tail.rfind(b"\n") + 1:]
+            return True
+
+        if st.st_size == self.offset:
+            return False
+        try:
+            data = self.partial + self._read(self.offset, st.st_size)
+        except OSError:
+            return False
+        self.offset = st.st_size
+        lines = data.split(b"\n")
+        self.partial = lines.pop()
+        for line in lines:
+            line = line.decode('utf-8', errors='replace')
+            if "STARTING" in line:
+                self.entry = {'generation': line.split("STARTING", 1)[1].strip(),
+                              'solution': None, 'generalized': False}
+            else:
+                run_log.check_solution_line(line, self.entry)
+        return True
+
+
+def watch(outputDirectory, interval=5.0):
+    """
+    Keeps the per-run table for outputDirectory on screen, redrawing it in
+    place every interval seconds. Each poll lists the directory for new
+    runs and reads only what was appended to the logs of unfinished runs.
+    """
+    import time
+
+    if outputDirectory[-1] != '/':
+        outputDirectory += '/'
+
+    watchers = {}
+    drawn = False
+    try:
+        while True:
+            found = find_run_files(outputDirectory)
+            new_runs = [i for i in found if i not in watchers]
+            for i in new_runs:
+                watchers[i] = RunWatcher(found[i].path)
+
+            changed = [watcher.poll() for watcher in watchers.values()]
+            if not new_runs and not any(changed) and drawn:
+                time.sleep(interval)
+                continue
+            drawn = True
+
+            runs = [watchers[i].entry if i in watchers else MISSING
+                    for i in range(max(watchers, default=-1) + 1)]
+            summary = summarize(runs)
+
+            # Move the cursor home and clear the screen before redrawing
+            table = "".join(run_line(i, entry) for i, entry in enumerate(runs))
+            sys.stdout.write("\033[H\033[J")
+            sys.stdout.write(f"{outputDirectory}   (every {interval:g}s, Ctrl-C to stop)\n\n")
+            sys.stdout.write(table)
+            sys.stdout.write("------------------------------------------------------------\n")
+            sys.stdout.write("Number of finished runs:            %4i\n" % len(summary['finished']))
+            sys.stdout.write("Solutions found:                    %4i\n" % len(summary['solutions']))
+            sys.stdout.write("Zero error on test set:             %4i\n" % len(summary['generalized']))
+            sys.stdout.flush()
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print()
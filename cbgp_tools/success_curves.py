@@ -0,0 +1,142 @@
+"""
+Success and survival curves over generations, from the end of each run log.
+
+A run that finds a solution stops in the generation it found it in, so the
+last STARTING generation that status.scrape reads from the tail of a log
+is the run's solution generation, and nothing else in the log is needed.
+For every problem and generation g this gives:
+
+    successRate   the fraction of the problem's runs that had found a
+                  solution by generation g
+    survival      the Kaplan-Meier estimate of the chance that a run has
+                  not found a solution by the end of generation g, with the
+                  runs that failed or are still going censored at their
+                  last generation
+
+curves() works on all problems at once: every count is a bincount over
+(problem, generation) cells of one matrix, and the curves are cumulative
+sums and products along its rows.
+"""
+
+import csv
+import os
+import sys
+
+import numpy as np
+
+from . import status
+
+HEADER = ["config", "problem", "directory", "generation", "runs", "atRisk", "solved", "censored",
+          "successRate", "survival"]
+
+
+def run_outcomes(runs):
+    """
+    (last generation, solved) arrays for the runs of one directory, as
+    returned by status.scrape, that have started a generation.
+    """
+    generations = []
+    solved = []
+    for entry in runs:
+        if entry is None or entry in (status.MISSING, status.SKIPPED) or entry['generation'] is None:
+            continue
+        generations.append(int(entry['generation']))
+        solved.append(bool(entry['solution']))
+    return np.array(generations, dtype=np.int64), np.array(solved, dtype=bool)
+
+
+def curves(outcomes):
+    """
+    Computes the curves of every problem from its run_outcomes. Returns a
+    dict of arrays with one row per problem and one column per generation
+    from 0 to the last generation of any run: 'runs' (one column), and
+    'atRisk', 'solved', 'censored', 'successRate' and 'survival'.
+    """
+    num_problems = len(outcomes)
+    width = max((int(gens.max()) for gens, _ in outcomes if len(gens)), default=0) + 1
+
+    problem = np.concatenate([np.full(len(gens), i, dtype=np.int64) for i, (gens, _) in enumerate(outcomes)]
+                             + [np.zeros(0, dtype=np.int64)])
+    generations = np.concatenate([gens for gens, _ in outcomes] + [np.zeros(0, dtype=np.int64)])
+    solved = np.concatenate([sol for _, sol in outcomes] + [np.zeros(0, dtype=bool)])
+    cells = problem * width + generations
+
+    events = np.bincount(cells[solved], minlength=num_problems * width).reshape(num_problems, width)
+    censored = np.bincount(cells[~solved], minlength=num_problems * width).reshape(num_problems, width)
+    runs = np.array([len(gens) for gens, _ in outcomes], dtype=np.int64)[:, None]
+
+    # A run is at risk in every generation up to and including its last
+    leaving = events + censored
+    at_risk = runs - (np.cumsum(leaving, axis=1) - leaving)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hazard = np.where(at_risk > 0, events / at_risk, 0.0)
+        success_rate = np.where(runs > 0, np.cumsum(events, axis=1) / runs, np.nan)
+    survival = np.cumprod(1 - hazard, axis=1)
+    survival[(runs == 0)[:, 0]] = np.nan
+
+    return {'runs': runs, 'atRisk': at_risk, 'solved': events, 'censored': censored,
+            'successRate': success_rate, 'survival': survival}
+
+
+def scrape(outputDirectories, use_cache=True, jobs=1, profile=None):
+    """
+    Reads the status of every run in outputDirectories with status.scrape
+    (so only the end of each log, and only of logs that changed since the
+    status cache was written) and returns the problems' run_outcomes.
+    """
+    outputDirectories = [os.path.join(directory, "") for directory in outputDirectories]
+    all_runs = status.scrape(outputDirectories, use_cache=use_cache, jobs=jobs, profile=profile)
+    return [run_outcomes(runs) for runs in all_runs]
+
+
+def config_and_problem(directory):
+    """
+    The configuration and problem of a results directory: the names of its
+    parent and of the directory itself, as in experiment_index.
+    """
+    path = os.path.abspath(directory)
+    return os.path.basename(os.path.dirname(path)), os.path.basename(path)
+
+
+def write_curves(out, outputDirectories, outcomes):
+    """
+    Writes the curves to the file object out as a CSV with HEADER, one row
+    per directory and generation up to the directory's own last generation.
+    plot --success draws each problem's curves together, one series per
+    configuration.
+    """
+    table = curves(outcomes)
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(HEADER)
+    for i, (directory, (gens, _)) in enumerate(zip(outputDirectories, outcomes)):
+        config, problem = config_and_problem(directory)
+        last = int(gens.max()) if len(gens) else -1
+        for g in range(last + 1):
+            writer.writerow([config, problem, directory, g, int(table['runs'][i, 0]),
+                             int(table['atRisk'][i, g]), int(table['solved'][i, g]), int(table['censored'][i, g]),
+                             float(table['successRate'][i, g]), float(table['survival'][i, g])])
+
+
+def scrape_and_write(outputDirectories, output=None, use_cache=True, jobs=1, profile=None):
+    """
+    Scrapes outputDirectories and writes their curves to output, or stdout
+    if it is None. Two directories with the same configuration and problem
+    names would make one curve out of two, so they are an error.
+    """
+    from . import profiling
+
+    seen = {}
+    for directory in outputDirectories:
+        key = config_and_problem(directory)
+        if key in seen:
+            raise ValueError(f"{seen[key]} and {directory} are both problem {key[1]} "
+                             f"of configuration {key[0]}")
+        seen[key] = directory
+
+    outcomes = scrape(outputDirectories, use_cache, jobs, profile)
+    with profiling.phase(profile, 'output'):
+        if output is None:
+            write_curves(sys.stdout, outputDirectories, outcomes)
+        else:
+            with open(output, 'w', newline='', encoding='utf-8') as f:
+                write_curves(f, outputDirectories, outcomes)
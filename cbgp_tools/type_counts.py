@@ -0,0 +1,154 @@
+"""
+Statistics on the runN_types.edn files in a results directory: how many
+types each run produced and how often they were used.
+"""
+
+import sys
+
+from . import profiling, run_files, run_log
+from .histogram import IntHistogram
+from .status import MISSING, SKIPPED, print_missing
+
+outputFilePrefix = "run"
+outputFileSuffix = "_types.edn"
+
+
+def find_run_files(outputDirectory):
+    """
+    Returns {run number: os.DirEntry} for every runN_types.edn in
+    outputDirectory, including any after a gap in the numbering. Compressed
+    files (run3_types.edn.gz, ...) count too.
+    """
+    return run_files.find_runs(outputDirectory, outputFilePrefix, outputFileSuffix)
+
+
+def count_file(filename, stats=None):
+    """
+    Reads one types file and returns (number of types, number with frequency
+    >= 10, >= 100, >= 1000, IntHistogram of all the frequencies), or None if
+    the file is empty.
+    """
+    freqs = run_log.read_types(filename, run_log.new_record(None), stats)['types']
+    if freqs is None:
+        return None
+
+    histogram = IntHistogram(freqs)
+    return (len(histogram), histogram.count_at_least(10), histogram.count_at_least(100),
+            histogram.count_at_least(1000), histogram)
+
+
+def scrape(outputDirectories, jobs=1, profile=None, select=None):
+    """
+    Counts the types files in each of outputDirectories, which must end in '/'.
+    Returns one (runs, freqs) pair per directory. runs has, for each run,
+    the first four numbers count_file returns for it (or None if its file
+    is empty), or status.MISSING for a run number below the highest with no
+    types file. freqs is the IntHistogram of the frequencies in all of the
+    directory's files, which each file's histogram is merged into as soon
+    as it arrives, so memory doesn't grow with the number of runs.
+    The files of all directories are spread over jobs processes. profile, if
+    given, is a profiling.Profile to record the time of each phase in.
+    select, if given, is called as select(outputDirectory, i) for each run,
+    and the runs it returns False for are not read and come back as
+    status.SKIPPED.
+    """
+    with profiling.phase(profile, 'listdir'):
+        found = [find_run_files(outputDirectory) for outputDirectory in outputDirectories]
+    all_runs = [[MISSING if i not in runs else
+                 runs[i].path if select is None or select(outputDirectory, i) else SKIPPED
+                 for i in range(max(runs, default=-1) + 1)]
+                for outputDirectory, runs in zip(outputDirectories, found)]
+    all_freqs = [IntHistogram() for _ in outputDirectories]
+
+    to_read = [(d, i) for d, runs in enumerate(all_runs) for i, path in enumerate(runs)
+               if path not in (MISSING, SKIPPED)]
+    counts = profiling.profiled_imap(count_file, [(all_runs[d][i],) for d, i in to_read],
+                                     jobs, profile, max_pending=4 * max(jobs, 1))
+    for (d, i), count in zip(to_read, counts):
+        if count is not None:
+            all_freqs[d].merge(count[4])
+            count = count[:4]
+        all_runs[d][i] = count
+
+    return list(zip(all_runs, all_freqs))
+
+
+def scrape_and_print(outputDirectory, verbose, as_csv, jobs=1, profile=None):
+    """Scrapes and prints from outputDirectory"""
+
+    if outputDirectory[-1] != '/':
+        outputDirectory += '/'
+
+    if not as_csv:
+        print()
+        print("           Directory of results:")
+        print(outputDirectory)
+
+    counts = scrape([outputDirectory], jobs, profile)[0]
+    with profiling.phase(profile, 'output'):
+        print_counts(outputDirectory, counts, as_csv)
+
+
+def summarize_counts(runs, freqs):
+    """
+    Aggregates the (runs, freqs) that scrape returns for one directory into
+    the medians and means that get printed. Everything is merged into exact
+    histograms, so memory doesn't grow with the number of runs or types.
+    """
+    num_types = IntHistogram()
+    freq_10 = IntHistogram()
+    freq_100 = IntHistogram()
+    freq_1000 = IntHistogram()
+
+    for count in runs:
+        if count is None or count == MISSING:
+            continue
+
+        num_types.add(count[0])
+        freq_10.add(count[1])
+        freq_100.add(count[2])
+        freq_1000.add(count[3])
+
+    return {
+        'median_num_types': num_types.median(),
+        'mean_num_types': num_types.mean(),
+        'median_freq_10': freq_10.median(),
+        'median_freq_100': freq_100.median(),
+        'median_freq_1000': freq_1000.median(),
+        'median_freq': freqs.median()
+    }
+
+
+def print_counts(outputDirectory, counts, as_csv):
+    """Prints the (runs, freqs) returned by scrape for one directory"""
+
+    runs, freqs = counts
+    for i in range(len(runs)):
+        if not as_csv:
+            sys.stdout.write("%4i" % i)
+            sys.stdout.flush()
+            if i % 25 == 24:
+                print()
+
+    summary = summarize_counts(runs, freqs)
+    missing = [i for i, count in enumerate(runs) if count == MISSING]
+
+    if not as_csv:
+        print()
+
+    if missing:
+        print_missing(outputDirectory, missing)
+
+    if as_csv:
+        print("Problem,MedianNumTypes,MeanNumTypes,MedianTypesWithFreqGTE10,MedianTypesWithFreqGTE100,MedianTypesWithFreqGTE1000,MedianFreqs")
+        print("%s,%i,%d,%i,%i,%i,%i" % (outputDirectory, summary['median_num_types'], summary['mean_num_types'],
+                                        summary['median_freq_10'], summary['median_freq_100'],
+                                        summary['median_freq_1000'], summary['median_freq']))
+
+    else:
+        print("------------------------------------------------------------")
+
+        print(f"Median number of types per run: {summary['median_num_types']}")
+        print(f"Mean number of types per run: {summary['mean_num_types']}")
+
+        print("------------------------------------------------------------")
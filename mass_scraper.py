@@ -1,23 +1,13 @@
 #!/usr/bin/python3 
 
 """
-Uses efficient_solution_counts.py to scrape each subdirectory of given directory.
-Uses csv printing and not verbose by default
+Scrapes each subdirectory of given directory, printing one CSV line per problem.
+This is the same as "python -m cbgp_tools mass"; the code lives in cbgp_tools/cli.py.
 """
 
-import sys, os
-import efficient_solution_counts, count_types
+import sys
 
-parent_dir = sys.argv[1]
+from cbgp_tools import cli
 
-
-problem_dirs = os.listdir(parent_dir)
-problem_dirs.sort()
-
-for prob in problem_dirs:
-    full = parent_dir + prob
-    efficient_solution_counts.scrape_and_print(full, False, True)
-
-# for prob in problem_dirs:
-#     full = parent_dir + prob
-#     count_types.scrape_and_print(full, False, True)
+if __name__ == "__main__":
+    cli.main(["mass"] + sys.argv[1:])
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The tests import cbgp_tools from this checkout, and the benchmarks'
+# synthetic log writer, the same way run_benchmarks.py does
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.join(REPO, "benchmarks"))
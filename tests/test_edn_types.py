@@ -0,0 +1,70 @@
+"""
+The types file reader must give the same pairs however the file is split
+into chunks, and skip brackets inside strings, comments and characters.
+"""
+
+import gzip
+import random
+
+import pytest
+
+import generate_logs
+from cbgp_tools import edn_types
+
+TRICKY = (b'[[{:type :string, :doc "a ] in a string"} 3]\n'
+          b' [{:type :char, :default \\]} 4] ; a [ comment\n'
+          b' [{:type :char, :default \\"} 5]\n'
+          b' [{:type :string, :doc "escaped \\" quote [ and \\\\"} 6]\n'
+          b' [{:type :string, :doc "a string\n'
+          b'over [ two lines"}, 7]\n'
+          b']')
+
+TRICKY_NAMES = ['{:type :string, :doc "a ] in a string"}',
+                '{:type :char, :default \\]}',
+                '{:type :char, :default \\"}',
+                '{:type :string, :doc "escaped \\" quote [ and \\\\"}',
+                '{:type :string, :doc "a string\nover [ two lines"}']
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 20])
+def test_tricky_pairs_in_any_chunks(size):
+    names, counts = edn_types.parse_chunks(chunked(TRICKY, size))
+    assert names == TRICKY_NAMES
+    assert list(counts) == [3, 4, 5, 6, 7]
+
+
+@pytest.mark.parametrize("size", [1, 5, 100, 4096])
+def test_read_matches_whole_parse(tmp_path, size):
+    path = tmp_path / "run0_types.edn"
+    generate_logs.write_types(path, random.Random(2), 300)
+    data = path.read_bytes()
+    expected = edn_types.parse_type_freqs(data)
+    assert len(expected[0]) == 300
+    assert edn_types.read_type_freqs(str(path), chunk_size=size) == expected
+
+    compressed = tmp_path / "run1_types.edn.gz"
+    compressed.write_bytes(gzip.compress(data))
+    assert edn_types.read_type_freqs(str(compressed), chunk_size=size) == expected
+
+
+def test_blank_file(tmp_path):
+    path = tmp_path / "run0_types.edn"
+    path.write_bytes(b"\n  \n")
+    assert edn_types.read_type_freqs(str(path)) is None
+
+
+@pytest.mark.parametrize("data", [
+    b'[[:a 1]\n [:b "unfinished]\n',
+    b'[[:a 1]\n [:b 2]\n',
+    b'[[:a 1]]]\n',
+    b'[[:a x]]\n',
+    b'[[1]]\n',
+])
+@pytest.mark.parametrize("size", [1, 4, 1 << 20])
+def test_malformed(data, size):
+    with pytest.raises(edn_types.EdnError):
+        edn_types.parse_chunks(chunked(data, size))
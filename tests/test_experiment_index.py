@@ -0,0 +1,42 @@
+"""Indexing an experiment keeps each directory's generation index as sizes would."""
+
+import os
+import random
+
+import generate_logs
+from cbgp_tools import experiment_index, scan_cache, size_diversity
+
+
+def sizes_index(directory):
+    """The generation index a full sizes scan of directory writes."""
+    list(size_diversity.iter_records([str(directory)], use_cache=False, use_index=True))
+    return scan_cache.load_cache(str(directory), size_diversity.GEN_INDEX_NAME)
+
+
+def test_index_writes_generation_index(tmp_path):
+    problem = tmp_path / "config" / "problem"
+    problem.mkdir(parents=True)
+    rng = random.Random(6)
+    full = {}
+    for run in range(3):
+        path = problem / f"run{run}.txt"
+        generate_logs.write_log(path, rng, 10, 40, generate_logs.OUTCOMES[0])
+        full[path] = path.read_bytes()
+        # Run 0 is still going, partway through a line
+        if run == 0:
+            path.write_bytes(full[path][:len(full[path]) // 2])
+
+    db = str(tmp_path / "index.db")
+    experiment_index.index(db, [str(tmp_path)])
+    indexed = scan_cache.load_cache(str(problem), size_diversity.GEN_INDEX_NAME)
+    os.remove(scan_cache.cache_path(str(problem), size_diversity.GEN_INDEX_NAME))
+    assert indexed == sizes_index(problem)
+
+    # Re-indexing after run 0 has grown only reads it from its last
+    # STARTING line on, and its index entry still covers the whole log
+    path = problem / "run0.txt"
+    path.write_bytes(full[path])
+    assert experiment_index.index(db, [str(tmp_path)]) == (1, 3, 1)
+    indexed = scan_cache.load_cache(str(problem), size_diversity.GEN_INDEX_NAME)
+    os.remove(scan_cache.cache_path(str(problem), size_diversity.GEN_INDEX_NAME))
+    assert indexed == sizes_index(problem)
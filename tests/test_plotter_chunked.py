@@ -0,0 +1,117 @@
+"""
+load_stats_chunked streams a file through per-generation aggregates and
+must give what load_stats' pandas groupby gives on the whole file, to the
+float32 precision the chunks are read in.
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cbgp_tools import plotter
+
+
+def metric_value(rng):
+    kind = rng.random()
+    if kind < 0.1:
+        return ""
+    if kind < 0.4:
+        return f"{rng.randint(1, 999)}/{rng.choice([2, 4, 8])}"
+    if kind < 0.7:
+        return str(rng.randint(1, 500))
+    return f"{rng.randint(0, 4000) / 8}"
+
+
+def write_stats(path, rows=900, generations=40):
+    rng = random.Random(5)
+    table = {'runNumber': [], 'generation': []}
+    for col in plotter.METRIC_COLUMNS:
+        table[col] = []
+    for _ in range(rows):
+        # Skewed towards early generations, and with a gap at 3
+        generation = min(int(rng.expovariate(1 / 8)), generations)
+        if generation == 3:
+            generation = 4
+        table['runNumber'].append(rng.randint(0, 30))
+        table['generation'].append(generation)
+        for col in plotter.METRIC_COLUMNS:
+            table[col].append(metric_value(rng))
+    # A generation with one row, which has no standard deviation
+    table['runNumber'].append(0)
+    table['generation'].append(generations + 5)
+    for col in plotter.METRIC_COLUMNS:
+        table[col].append("7")
+    pd.DataFrame(table).to_csv(path, index=False)
+
+
+@pytest.fixture
+def stats_csv(tmp_path):
+    path = tmp_path / "stats.csv"
+    write_stats(path)
+    return str(path)
+
+
+@pytest.fixture
+def stats_npz(tmp_path, stats_csv):
+    df = pd.read_csv(stats_csv)
+    path = tmp_path / "stats.npz"
+    columns = {'runNumber': df['runNumber'].to_numpy(dtype=np.int32),
+               'generation': df['generation'].to_numpy(dtype=np.int32)}
+    for col in plotter.METRIC_COLUMNS:
+        columns[col] = plotter.parse_fraction_column(df[col])[0].to_numpy(dtype=np.float64)
+    np.savez(path, **columns)
+    return str(path)
+
+
+@pytest.mark.parametrize("mode", ["mean", "median"])
+@pytest.mark.parametrize("chunk_rows", [13, 100, 10000])
+@pytest.mark.parametrize("data", ["stats_csv", "stats_npz"])
+def test_chunked_matches_groupby(request, data, mode, chunk_rows):
+    filepath = request.getfixturevalue(data)
+    expected = plotter.load_stats(filepath, mode)
+    chunked = plotter.load_stats(filepath, mode, chunk_rows=chunk_rows)
+    pd.testing.assert_frame_equal(chunked, expected, check_dtype=False, check_index_type=False,
+                                  rtol=1e-6, atol=1e-9)
+
+
+def test_chunked_rejects_unknown_mode(stats_csv):
+    with pytest.raises(ValueError):
+        plotter.load_stats_chunked(stats_csv, 'mode')
+
+
+def write_tied_and_skewed(path, rows, generations):
+    rng = np.random.default_rng(7)
+    generation = np.arange(rows) % generations
+    tied = (generation * 3).astype(float)
+    skewed = rng.integers(10, 20, rows).astype(float)
+    skewed[:generations] = 1e9
+    pd.DataFrame({
+        'runNumber': 0,
+        'generation': generation,
+        'codeSizeMean': tied,
+        'codeSizeMedian': skewed,
+        'genomeSizeMean': np.floor(rng.pareto(1.2, rows) * 10),
+        'genomeSizeMedian': rng.pareto(1.2, rows),
+        'uniqueBehaviors': np.full(rows, 5.0),
+    }).to_csv(path, index=False)
+
+
+@pytest.mark.parametrize("rows", [4000, 40000])
+def test_chunked_median_keeps_few_values(tmp_path, monkeypatch, rows):
+    # Small bins and few candidates, so that the bound on what is kept
+    # is well below the number of rows
+    monkeypatch.setattr(plotter, 'QUANTILE_BINS', 8)
+    monkeypatch.setattr(plotter, 'QUANTILE_CANDIDATES', 8)
+    generations = 10
+    path = str(tmp_path / "stats.csv")
+    write_tied_and_skewed(path, rows, generations)
+
+    stats = {}
+    chunked = plotter.load_stats_chunked(path, 'median', 1000, stats=stats)
+    pd.testing.assert_frame_equal(chunked, plotter.load_stats(path, 'median'), check_dtype=False,
+                                  check_index_type=False, rtol=1e-6, atol=1e-9)
+    # At most QUANTILE_CANDIDATES values for each of the six ranks of each
+    # generation of each metric, whatever the number of rows
+    assert stats['kept'] <= generations * 6 * len(plotter.METRIC_COLUMNS) * 8
@@ -0,0 +1,108 @@
+"""
+The array versions of the tests in significance must agree with the
+textbook definitions, worked out one comparison at a time.
+"""
+
+import collections
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from cbgp_tools import significance
+
+
+def fisher_brute_force(a, n1, c, n2):
+    k = a + c
+    n = n1 + n2
+
+    def pmf(x):
+        return math.comb(n1, x) * math.comb(n2, k - x) / math.comb(n, k)
+
+    observed = pmf(a)
+    return min(1.0, sum(pmf(x) for x in range(max(0, k - n2), min(k, n1) + 1)
+                        if pmf(x) <= observed * (1 + 1e-7)))
+
+
+def mann_whitney_brute_force(sample1, sample2):
+    u = sum(1.0 if x > y else 0.5 if x == y else 0.0 for x in sample1 for y in sample2)
+    n1, n2 = len(sample1), len(sample2)
+    n = n1 + n2
+    ties = sum(t ** 3 - t for t in collections.Counter(list(sample1) + list(sample2)).values())
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    z = max(abs(u - n1 * n2 / 2) - 0.5, 0) / sigma
+    return u, min(1.0, math.erfc(z / math.sqrt(2)))
+
+
+def test_fisher_exact_matches_brute_force():
+    tables = [(a, n1, c, n2) for n1, n2 in [(1, 1), (5, 7), (10, 10), (30, 12)]
+              for a in range(n1 + 1) for c in range(n2 + 1)]
+    a, n1, c, n2 = zip(*tables)
+    p = significance.fisher_exact(a, n1, c, n2)
+    expected = [fisher_brute_force(*table) for table in tables]
+    np.testing.assert_allclose(p, expected, rtol=1e-9)
+
+
+def test_fisher_exact_known_value():
+    # The tea tasting experiment: 3 of 4 cups right, p = 17/35
+    assert significance.fisher_exact([3], [4], [1], [4])[0] == pytest.approx(17 / 35)
+
+
+def test_mann_whitney_matches_brute_force():
+    rng = random.Random(3)
+    samples1 = []
+    samples2 = []
+    for _ in range(200):
+        # Small integer values, so there are plenty of ties
+        values = range(rng.choice([3, 10, 1000]))
+        samples1.append(np.array([rng.choice(values) for _ in range(rng.randint(1, 15))], dtype=float))
+        samples2.append(np.array([rng.choice(values) for _ in range(rng.randint(1, 15))], dtype=float))
+    u, p = significance.mann_whitney(samples1, samples2)
+    for i, (sample1, sample2) in enumerate(zip(samples1, samples2)):
+        if len(set(sample1) | set(sample2)) == 1:
+            assert np.isnan(p[i])
+            continue
+        expected_u, expected_p = mann_whitney_brute_force(sample1, sample2)
+        assert u[i] == pytest.approx(expected_u)
+        assert p[i] == pytest.approx(expected_p, rel=1e-9)
+
+
+def test_mann_whitney_empty_sample():
+    u, p = significance.mann_whitney([np.array([1.0, 2.0]), np.zeros(0)], [np.array([3.0]), np.array([1.0])])
+    assert u[0] == 0
+    assert np.isnan(p[1])
+
+
+def holm_brute_force(p):
+    m = len(p)
+    order = sorted(range(m), key=lambda i: p[i])
+    return [min(1.0, max((m - j) * p[order[j]] for j in range(order.index(i) + 1))) for i in range(m)]
+
+
+def bh_brute_force(p):
+    m = len(p)
+    order = sorted(range(m), key=lambda i: p[i])
+    return [min(1.0, min(m / (j + 1) * p[order[j]] for j in range(order.index(i), m))) for i in range(m)]
+
+
+@pytest.mark.parametrize("correction, brute_force", [('holm', holm_brute_force), ('bh', bh_brute_force)])
+def test_corrections_match_brute_force(correction, brute_force):
+    rng = random.Random(4)
+    for m in (1, 2, 5, 40):
+        p = [rng.choice([rng.random(), rng.random() / 1000, 0.05]) for _ in range(m)]
+        np.testing.assert_allclose(significance.adjust(p, correction), brute_force(p), rtol=1e-12)
+
+
+def test_adjust_leaves_untested_out():
+    p = [0.01, np.nan, 0.04]
+    adjusted = significance.adjust(p, 'bonferroni')
+    np.testing.assert_allclose(adjusted[[0, 2]], [0.02, 0.08])
+    assert np.isnan(adjusted[1])
+
+
+def test_config_pairs():
+    keys = [('p1', 'b'), ('p1', 'a'), ('p2', 'a'), ('p1', 'c')]
+    assert significance.config_pairs(keys) == [
+        ('p1', config1, config2) for config1, config2 in itertools.combinations('abc', 2)]
@@ -0,0 +1,65 @@
+"""
+The size and diversity scan cache must give back exactly what parsing the
+logs from scratch gives, whether a log is unchanged or has grown.
+"""
+
+import os
+import random
+
+import pytest
+
+import generate_logs
+from cbgp_tools import size_diversity
+
+
+def rows_and_status(records):
+    return [(record['run'], record['generation'], record['solution'], record['generalized'],
+             record['rows']) for record in records]
+
+
+def write_logs(directory, runs=3, generations=12):
+    rng = random.Random(1)
+    for run in range(runs):
+        outcome = generate_logs.OUTCOMES[run % len(generate_logs.OUTCOMES)]
+        generate_logs.write_log(os.path.join(directory, f"run{run}.txt"), rng, generations, 40, outcome)
+
+
+def test_cache_entry_round_trip(tmp_path):
+    write_logs(tmp_path)
+    for record in size_diversity.scrape([str(tmp_path)], use_cache=False)[0]:
+        cached = size_diversity.record_from_cache(size_diversity.cache_entry(record))
+        assert cached['rows'] == record['rows']
+        for key in size_diversity.CACHED_KEYS:
+            assert cached[key] == record[key]
+        assert cached['starts'] is None
+
+
+def test_unchanged_logs_come_from_the_cache(tmp_path):
+    write_logs(tmp_path)
+    fresh = size_diversity.scrape([str(tmp_path)], use_cache=True)[0]
+    cached = size_diversity.scrape([str(tmp_path)], use_cache=True)[0]
+    assert rows_and_status(cached) == rows_and_status(fresh)
+
+
+@pytest.mark.parametrize("cut", [0.1, 0.5, 0.9])
+def test_resumed_parse_matches_full_parse(tmp_path, cut):
+    full = tmp_path / "full"
+    grown = tmp_path / "grown"
+    full.mkdir()
+    grown.mkdir()
+    write_logs(full)
+
+    # Start each log off partway through a line, as if caught mid-write,
+    # scrape it, then append the rest and scrape it again
+    for name in sorted(os.listdir(full)):
+        data = (full / name).read_bytes()
+        (grown / name).write_bytes(data[:int(len(data) * cut)])
+    size_diversity.scrape([str(grown)], use_cache=True)
+    for name in sorted(os.listdir(full)):
+        data = (full / name).read_bytes()
+        with open(grown / name, 'ab') as f:
+            f.write(data[os.path.getsize(grown / name):])
+
+    resumed = size_diversity.scrape([str(grown)], use_cache=True)[0]
+    expected = size_diversity.scrape([str(full)], use_cache=False)[0]
+    assert rows_and_status(resumed) == rows_and_status(expected)
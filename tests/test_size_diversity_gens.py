@@ -0,0 +1,23 @@
+"""--gens values are parsed like Python slices, and nonsense is rejected."""
+
+import pytest
+
+from cbgp_tools import size_diversity
+
+
+@pytest.mark.parametrize("spec, gens", [
+    ("5", (5, 6, 1)),
+    ("0", (0, 1, 1)),
+    ("3:", (3, None, 1)),
+    (":7", (0, 7, 1)),
+    ("::2", (0, None, 2)),
+    ("10:20:5", (10, 20, 5)),
+])
+def test_parse_gens(spec, gens):
+    assert size_diversity.parse_gens(spec) == gens
+
+
+@pytest.mark.parametrize("spec", ["-5", "-1:", "5:3", "5:5", "1:2:0", "x", "1:2:3:4"])
+def test_parse_gens_rejects(spec):
+    with pytest.raises(ValueError):
+        size_diversity.parse_gens(spec)